@@ -5,12 +5,16 @@ from numpy import add as npadd
 
 from items.treasure_core import TreasureObject
 import items
+from items import codec
 
 
 def load(fname):
-    with open(fname, "r") as fh:
+    with open(fname, "rb") as fh:
         data = fh.read()
-    item = jsonpickle.decode(data)
+    if data.startswith(codec.MAGIC):
+        return codec.decode(data)
+    # Saved before the binary format
+    item = jsonpickle.decode(data.decode())
     return item
 
 
@@ -0,0 +1,118 @@
+"""
+Benchmarks for the loot generation pipeline.
+
+Times every stage of making and presenting an item, for each weapon class and each
+bottle factory, with fixed seeds so runs can be compared:
+    python benchmark.py -n 500 -o bench.json
+    python benchmark.py -n 500 --compare bench.json
+"""
+import argparse
+import json
+import platform
+import time
+
+import numpy
+from numpy import random as npr
+
+from items import consumables, treasure_core, util, weapons
+from items.weapons import damage
+from selection import choose_from, choose_one
+
+
+def timed(fn, args_list):
+    """Call FN once per element of ARGS_LIST; Return (seconds per call, results)"""
+    start = time.perf_counter()
+    out = [fn(*a) for a in args_list]
+    return (time.perf_counter() - start) / max(len(args_list), 1), out
+
+
+def bench_factory(make, n, seed, weapon=False):
+    rng = npr.default_rng(seed)
+    stages = {}
+
+    stages["construct"], objs = timed(lambda: make(rng=rng), [()] * n)
+    if weapon:
+        stages["calc_damage"], _ = timed(lambda o: o.calc_damage(), [(o,) for o in objs])
+    stages["item_description"], _ = timed(util.item_description, [(o,) for o in objs])
+    stages["serialize"], _ = timed(lambda o: o.serialize(), [(o,) for o in objs])
+    # Last, since shuffling again piles more decor onto each object
+    stages["shuffle"], _ = timed(
+        lambda o: treasure_core.shuffle(o, r=True, rng=rng), [(o,) for o in objs]
+    )
+
+    return {
+        "items_per_second": 1 / stages["construct"] if stages["construct"] else None,
+        "seconds_per_item": stages,
+    }
+
+
+def bench_selection(n, seed):
+    npr.seed(seed)
+    tree = damage.Damager.materials
+    return {
+        "choose_from": timed(choose_from, [(tree,)] * n)[0],
+        "choose_one": timed(choose_one, [(tree,)] * n)[0],
+    }
+
+
+def run(n, seed):
+    npr.seed(seed)
+    results = {"selection": bench_selection(n * 10, seed)}
+    for group in weapons.weapons:
+        for cls in group:
+            results[cls.__name__] = bench_factory(cls, n, seed, weapon=True)
+    for make in consumables.bottles:
+        results[make.__name__] = bench_factory(make, n, seed)
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "n": n,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def flat(results, prefix=""):
+    # {"Sword": {"seconds_per_item": {"shuffle": x}}} -> {"Sword.seconds_per_item.shuffle": x}
+    out = {}
+    for k, v in results.items():
+        if type(v) == dict:
+            out.update(flat(v, prefix + k + "."))
+        else:
+            out[prefix + k] = v
+    return out
+
+
+def report(data, old=None):
+    new = flat(data["results"])
+    old = flat(old["results"]) if old else {}
+    width = max(len(k) for k in new)
+    for k, v in new.items():
+        line = f"{k:<{width}}  {v:>12.6g}"
+        if old.get(k):
+            line += f"  {v / old[k]:>7.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=200, help="items per class")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="save results as JSON here")
+    parser.add_argument("--compare", help="JSON results of an earlier run, to compare with")
+    args = parser.parse_args()
+
+    data = run(args.n, args.seed)
+    old = None
+    if args.compare:
+        with open(args.compare) as fh:
+            old = json.load(fh)
+    report(data, old)
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(data, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Export balance catalogs: N generated items of every weapon class and bottle kind,
+rendered to one paged text file per kind. Generation and rendering are spread over
+a pool of processes; Every item is reproducible from the seed and its number.
+    python catalog.py -n 100000 -o catalog --images
+"""
+import argparse
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from items import consumables, generate, util, weapons
+
+# Size of the write buffer for each catalog file
+BUFFER = 1 << 20
+
+
+def factories():
+    for group in weapons.weapons:
+        yield from group
+    yield from consumables.bottles
+
+
+def render_range(factory, seed, start, stop, page, images):
+    """Generate and render items START to STOP-1 of FACTORY; Return the text"""
+    out = io.StringIO()
+    for i in range(start, stop):
+        if i % page == 0:
+            if i:
+                out.write("\f")
+            out.write(f"=== {factory.__name__} catalog, page {i // page + 1} ===\n\n")
+        item = generate.generate_item(factory, seed, i)
+        out.write(f"#{i}\n")
+        out.write(util.format_item(item, images=images))
+        out.write("\n\n")
+    return out.getvalue()
+
+
+def in_order(pool, jobs, ahead):
+    """
+    Results of JOBS, each a function and its arguments, in order; Keeps AHEAD jobs
+    waiting in POOL, and lets go of each one once its result is taken.
+    """
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.submit(*job))
+        if len(pending) > ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def export(n, outdir, seed=0, workers=None, page=50, images=False, chunk=500):
+    """Write the catalogs; Return the number of items rendered"""
+    os.makedirs(outdir, exist_ok=True)
+    # Chunks are whole pages, so that page headers fall in the right places
+    chunk = max(page, chunk // page * page)
+    kinds = list(factories())
+    starts = range(0, n, chunk)
+    jobs = (
+        (render_range, factory, seed, i, min(i + chunk, n), page, images)
+        for factory in kinds
+        for i in starts
+    )
+    with ProcessPoolExecutor(workers) as pool:
+        # Jobs run on past the end of each kind, so the workers never wait on a write
+        texts = in_order(pool, jobs, 2 * (workers or os.cpu_count() or 1))
+        for factory in kinds:
+            path = os.path.join(outdir, factory.__name__ + ".txt")
+            with open(path, "w", buffering=BUFFER) as fh:
+                for _ in starts:
+                    fh.write(next(texts))
+    return n * len(kinds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=100, help="items per kind")
+    parser.add_argument("-o", "--output", default="catalog", help="directory to write to")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--page", type=int, default=50, help="items per page")
+    parser.add_argument("--images", action="store_true", help="include ASCII art")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = export(args.n, args.output, args.seed, args.jobs, args.page, args.images)
+    elapsed = time.perf_counter() - start
+    print(f"{count} items in {elapsed:.2f}s ({count / elapsed:.0f} items/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Combat, resolved for many fights at once. Fight i is between creature A[i],
+wielding weapon A_weapons[i], and creature B[i], wielding B_weapons[i]. Every round,
+in each fight the faster weapon strikes first (then the longer, then either), and
+the other strikes back if its wielder still lives. A strike lands on one body part,
+drawn by TARGET_WEIGHT, for the C/P/S damage of the weapon over DAMAGE_SCALE,
+give or take a quarter.
+"""
+from numpy import arange, array, asarray, bincount, broadcast_to, flatnonzero, searchsorted, zeros
+from numpy import random as npr
+
+from creatures.creature_core import Creature, HealthTable, by_table
+from items.weapons import calc_damage_batch
+
+DAMAGE_SCALE = 10  # As in the DPS figure of a weapon description
+SPREAD = 0.25
+TARGET_WEIGHT = {"Torso": 4, "Head": 1}  # Any other part: 2
+
+# Body layout -> cumulative probability of each slot being struck
+_targets = {}
+
+
+def target_cdf(table):
+    try:
+        return _targets[table.layout]
+    except KeyError:
+        w = array([TARGET_WEIGHT.get(slot, 2) for slot in table.layout], float).cumsum()
+        new = _targets[table.layout] = w / w[-1]
+        return new
+
+
+def weapon_stats(weapons):
+    """C/P/S damage (n, 3), speed (n) and reach (n) of WEAPONS, as arrays"""
+    return (
+        calc_damage_batch(weapons),
+        array([w.speed() for w in weapons], float),
+        array([w.reach for w in weapons], float),
+    )
+
+
+class Side:
+    """One side of many fights: Health rows grouped by table, and weapon stats"""
+
+    def __init__(self, groups, n, stats):
+        self.groups = [(table, asarray(pos), asarray(rows)) for table, pos, rows in groups]
+        self.n = n
+        self.dmg, self.speed, self.reach = (broadcast_to(s, (n,) + s.shape[1:]) for s in stats)
+        self.dealt = zeros((n, 3))  # C/P/S damage dealt by this side, per fight
+
+    @classmethod
+    def of(cls, creatures, weapons):
+        return cls(by_table(creatures), len(creatures), weapon_stats(weapons))
+
+    def dead(self):
+        out = zeros(self.n, bool)
+        for table, pos, rows in self.groups:
+            out[pos] = table.is_dead(rows)
+        return out
+
+    def struck(self, mask, amounts, rng):
+        """Take a strike of AMOUNTS (n) in every fight where MASK is set"""
+        for table, pos, rows in self.groups:
+            hit = mask[pos]
+            if not hit.any():
+                continue
+            cols = searchsorted(target_cdf(table), rng.random(hit.sum()), "right")
+            table.damage(rows[hit], cols, amounts[pos[hit]])
+
+
+def strike(attackers, defenders, mask, rng):
+    idx = flatnonzero(mask)
+    if not len(idx):
+        return
+    dmg = attackers.dmg[idx] * rng.uniform(1 - SPREAD, 1 + SPREAD, (len(idx), 1))
+    dmg /= DAMAGE_SCALE
+    attackers.dealt[idx] += dmg
+    amounts = zeros(attackers.n)
+    amounts[idx] = dmg.sum(1)
+    defenders.struck(mask, amounts, rng)
+
+
+class Outcome:
+    __slots__ = ("winner", "rounds", "dealt_a", "dealt_b")
+
+    def __init__(self, winner, rounds, dealt_a, dealt_b):
+        self.winner = winner  # Per fight; 1: A, 2: B, 0: Neither
+        self.rounds = rounds  # Per fight, the round it ended in, or the limit
+        self.dealt_a = dealt_a
+        self.dealt_b = dealt_b
+
+
+def resolve(a, b, rounds=10, rng=None):
+    """Fight Side A against Side B for up to ROUNDS rounds; Return an Outcome"""
+    rng = rng or npr.default_rng()
+    n = a.n
+    a_first = (a.speed > b.speed) | (
+        (a.speed == b.speed)
+        & ((a.reach > b.reach) | ((a.reach == b.reach) & (rng.random(n) < 0.5)))
+    )
+    ended = zeros(n, int)
+    fighting = ~(a.dead() | b.dead())
+    for r in range(1, rounds + 1):
+        if not fighting.any():
+            break
+        strike(a, b, fighting & a_first, rng)
+        strike(b, a, fighting & ~a_first, rng)
+        left = fighting & ~(a.dead() | b.dead())
+        strike(a, b, left & ~a_first, rng)
+        strike(b, a, left & a_first, rng)
+        done = fighting & (a.dead() | b.dead())
+        ended[done] = r
+        fighting &= ~done
+    ended[ended == 0] = rounds
+
+    a_dead, b_dead = a.dead(), b.dead()
+    winner = zeros(n, int)
+    winner[b_dead & ~a_dead] = 1
+    winner[a_dead & ~b_dead] = 2
+    return Outcome(winner, ended, a.dealt, b.dealt)
+
+
+def fight(a, a_weapons, b, b_weapons, rounds=10, rng=None):
+    """Fight creatures A[i] against B[i], with their weapons; Their wounds are kept"""
+    return resolve(Side.of(a, a_weapons), Side.of(b, b_weapons), rounds, rng)
+
+
+def sweep(a_weapons, b_weapons, duels, cls=Creature, rounds=50, chunk=100000, rng=None):
+    """
+    Fight DUELS duels between fresh creatures of class CLS, for balance testing;
+        Each side wields one weapon, or a weapon per duel. No creatures are made,
+        only rows of a scratch HealthTable. Return the share of duels won by A, won
+        by B, and left undecided, and the mean rounds taken.
+    """
+    rng = rng or npr.default_rng()
+    stats = [
+        weapon_stats(w if type(w) == list else [w]) for w in (a_weapons, b_weapons)
+    ]
+    wins = zeros(3, int)  # Neither, A, B
+    total_rounds = 0
+    for start in range(0, duels, chunk):
+        n = min(chunk, duels - start)
+        sides = []
+        for s in stats:
+            if len(s[1]) > 1:
+                s = tuple(x[start : start + n] for x in s)
+            table = HealthTable(cls, capacity=n)
+            table.rate = 0  # Nobody heals in the moments a duel takes
+            sides.append(Side([(table, arange(n), arange(n))], n, s))
+        out = resolve(*sides, rounds=rounds, rng=rng)
+        wins += bincount(out.winner, minlength=3)
+        total_rounds += int(out.rounds.sum())
+    return float(wins[1] / duels), float(wins[2] / duels), float(wins[0] / duels), total_rounds / duels
@@ -1,5 +1,3 @@
 from . import creature_core as core
 
 from . import sapient
-from . import sentient
-from . import basic
@@ -1,17 +1,205 @@
+from bisect import bisect_right
+import datetime as dt
+from itertools import accumulate
+
+from numpy import asarray, full, ones, subtract, zeros
+
+import dungeontime
+
 STATUS_STATE = ["Healthy", "Injured", "Wounded", "Critical"]
-STATUS_RECOVERY = [0, 8, 24, 72]
+STATUS_RECOVERY = [0, 8, 24, 72]  # Hours of rest to get over each, to the one before
+# Status -> hours of rest to get back to each better status in turn
+_RECOVERED_BY = [list(accumulate(STATUS_RECOVERY[s:0:-1])) for s in range(len(STATUS_RECOVERY))]
+
+MAX_HP = 100
+
+# Creature class -> HealthTable
+_tables = {}
+
+
+def recover_status(status, hours):
+    """Status after HOURS of rest from STATUS, and how many of those hours it took"""
+    steps = bisect_right(_RECOVERED_BY[status], hours)
+    return status - steps, _RECOVERED_BY[status][steps - 1] if steps else 0
+
+
+def health_table(cls):
+    """The HealthTable of every creature of class CLS; Its layout is worked out once"""
+    try:
+        return _tables[cls]
+    except KeyError:
+        new = _tables[cls] = HealthTable(cls)
+        return new
+
+
+class HealthTable:
+    """
+    Hit points of every body part of every creature of one class, as a matrix of
+        creatures (rows) by body slots (columns). A creature holds a HealthRow.
+        Healing is not ticked: Each row keeps the time it was last brought up to
+        date, and catches up on the hours since whenever it is next used.
+    """
+
+    def __init__(self, cls, capacity=64):
+        self.cls = cls
+        self.layout = tuple(
+            sorted(set(cls.vital + cls.walk + cls.swim + cls.fly + cls.grasp + cls.aux))
+        )
+        self.index = {slot: i for i, slot in enumerate(self.layout)}
+        self.vital = [self.index[slot] for slot in cls.vital]
+        self.hp = full((capacity, len(self.layout)), MAX_HP, float)
+        self.dead = zeros((capacity, len(self.layout)), bool)
+        self.stamp = full(capacity, dungeontime.now().timestamp())
+        self.rate = cls.rate_healing / 3600  # Per second
+        self.used = 0
+        self.free = []
+
+    def allocate(self):
+        if self.free:
+            row = self.free.pop()
+            self.stamp[row] = dungeontime.now().timestamp()
+            return row
+        now = dungeontime.now().timestamp()
+        if self.used == len(self.hp):
+            hp = full((2 * self.used, len(self.layout)), MAX_HP, float)
+            dead = zeros(hp.shape, bool)
+            stamp = full(2 * self.used, now)
+            hp[: self.used] = self.hp
+            dead[: self.used] = self.dead
+            stamp[: self.used] = self.stamp
+            self.hp, self.dead, self.stamp = hp, dead, stamp
+        self.stamp[self.used] = now
+        self.used += 1
+        return self.used - 1
+
+    def release(self, row):
+        self.hp[row] = MAX_HP
+        self.dead[row] = False
+        self.free.append(row)
+
+    def columns(self, slots):
+        return [self.index[slot] for slot in slots]
+
+    def settle(self, rows, now=None):
+        """Bring ROWS up to date with the healing done since they were last used"""
+        if not self.rate:
+            return
+        now = dungeontime.now().timestamp() if now is None else now
+        rows = asarray(rows)
+        gain = (now - self.stamp[rows]).clip(min=0) * self.rate
+        hp = self.hp[rows] + gain[:, None]
+        hp.clip(max=MAX_HP, out=hp)
+        hp[self.dead[rows]] = 0
+        self.hp[rows] = hp
+        self.stamp[rows] = now
+
+    def damage(self, rows, cols, amounts):
+        """Take AMOUNTS from parts (ROWS, COLS); Repeated parts take every hit"""
+        self.settle(rows)
+        subtract.at(self.hp, (rows, cols), amounts)
+        hit = self.hp[rows, cols] <= 0
+        rows, cols = asarray(rows)[hit], asarray(cols)[hit]
+        self.hp[rows, cols] = 0
+        self.dead[rows, cols] = True
+
+    def heal(self, rows, amounts):
+        """Give AMOUNTS to every living part of ROWS, up to MAX_HP"""
+        rows = asarray(rows)
+        self.settle(rows)
+        hp = self.hp[rows] + asarray(amounts, float).reshape(-1, 1)
+        hp.clip(max=MAX_HP, out=hp)
+        hp[self.dead[rows]] = 0
+        self.hp[rows] = hp
+
+    def is_dead(self, rows):
+        """Whether each of ROWS has lost a vital part"""
+        return self.dead[asarray(rows)[:, None], self.vital].any(axis=1)
+
+
+def _restore_row(cls, hp, dead, stamp):
+    new = HealthRow(health_table(cls))
+    new.table.hp[new.row] = hp
+    new.table.dead[new.row] = dead
+    new.table.stamp[new.row] = stamp
+    return new
+
+
+class HealthRow:
+    """The row of a HealthTable held by one creature; Freed with it"""
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table):
+        self.table = table
+        self.row = table.allocate()
+
+    def __del__(self):
+        self.table.release(self.row)
+
+    def __reduce__(self):
+        t = self.table
+        return _restore_row, (
+            t.cls, t.hp[self.row].tolist(), t.dead[self.row].tolist(), float(t.stamp[self.row])
+        )
 
 
 class BodyPart:
-    def __init__(self):
-        self.hp = 100
-        self.dead = False
+    """One body part of a creature, read from and written to its HealthRow"""
+
+    __slots__ = ("health", "col")
+
+    def __init__(self, health, col):
+        self.health = health
+        self.col = col
+
+    @property
+    def hp(self):
+        h = self.health
+        h.table.settle([h.row])
+        return h.table.hp[h.row, self.col]
+
+    @property
+    def dead(self):
+        return bool(self.health.table.dead[self.health.row, self.col])
 
     def damage(self, amount):
-        self.hp -= amount
-        if self.hp <= 0:
-            self.hp = 0
-            self.dead = True
+        h = self.health
+        h.table.damage([h.row], [self.col], [amount])
+
+
+def by_table(creatures):
+    """Split CREATURES by HealthTable; Yield (table, positions in CREATURES, rows)"""
+    groups = {}
+    for i, creature in enumerate(creatures):
+        h = creature.health
+        pos, rows = groups.setdefault(h.table, ([], []))
+        pos.append(i)
+        rows.append(h.row)
+    for table, (pos, rows) in groups.items():
+        yield table, pos, rows
+
+
+def damage_many(creatures, slots, amounts):
+    """Deal AMOUNTS[i] to body slot SLOTS[i] of CREATURES[i], for every i at once"""
+    amounts = asarray(amounts, float) * ones(len(creatures))
+    for table, pos, rows in by_table(creatures):
+        cols = table.columns([slots[i] for i in pos])
+        table.damage(rows, cols, amounts[pos])
+
+
+def heal_many(creatures, amounts):
+    """Give AMOUNTS[i] hit points to every living part of CREATURES[i]"""
+    amounts = asarray(amounts, float) * ones(len(creatures))
+    for table, pos, rows in by_table(creatures):
+        table.heal(rows, amounts[pos])
+
+
+def dead_many(creatures):
+    """Whether each of CREATURES has lost a vital part, as a boolean array"""
+    out = zeros(len(creatures), bool)
+    for table, pos, rows in by_table(creatures):
+        out[pos] = table.is_dead(rows)
+    return out
 
 
 class Creature:
@@ -47,11 +235,7 @@ class Creature:
 
     def __init__(self, name=None, location=None, status=0):
         self.name = name
-        self.body = {}
-        for slot in set(
-            self.vital + self.walk + self.swim + self.fly + self.grasp + self.aux
-        ):
-            self.body[slot] = BodyPart()
+        self.health = HealthRow(health_table(type(self)))
 
         self.location = location
         self.status = status
@@ -60,6 +244,40 @@ class Creature:
         self.skill_swim = 1
         self.skill_fly = 1
 
+    @property
+    def body(self):
+        """Body slot -> BodyPart"""
+        index = self.health.table.index
+        return {slot: BodyPart(self.health, col) for slot, col in index.items()}
+
+    @property
+    def status(self):
+        """Index into STATUS_STATE; Recovers with rest, worked out when read"""
+        hours = (dungeontime.now() - self._status_since).total_seconds() / 3600
+        status, spent = recover_status(self._status, hours)
+        if status != self._status:
+            self._status = status
+            self._status_since += dt.timedelta(hours=spent)
+        return status
+
+    @status.setter
+    def status(self, value):
+        self._status = value
+        self._status_since = dungeontime.now()
+
+    @property
+    def dead(self):
+        h = self.health
+        return bool(h.table.is_dead([h.row])[0])
+
+    def damage(self, slot, amount):
+        h = self.health
+        h.table.damage([h.row], [h.table.index[slot]], [amount])
+
+    def heal(self, amount):
+        h = self.health
+        h.table.heal([h.row], [amount])
+
     def speed(self, stype):
         speed = getattr(self, "speed_" + stype, 0)
         skill = getattr(self, "skill_" + stype, 0)
@@ -1,6 +1,7 @@
 import datetime as dt
+import time
 
-from astral import Astral
+from astral import Astral, AstralError
 
 
 A = Astral()
@@ -22,9 +23,64 @@ class UTC(dt.tzinfo):
 utc = UTC()
 
 
+class Clock:
+    """The source of the current time for the whole world; This one is real time"""
+
+    def now(self):
+        return dt.datetime.now(utc)
+
+
+class SimulatedClock(Clock):
+    """
+    Game time, which starts at START and runs RATE times as fast as real time; It
+        can also be moved on by hand, for fast-forwarding the world offline.
+    """
+
+    def __init__(self, start=None, rate=1):
+        self.start = start or dt.datetime.now(utc)
+        self.rate = rate
+        self.skipped = ZERO
+        self._real_start = time.monotonic()
+
+    def now(self):
+        elapsed = (time.monotonic() - self._real_start) * self.rate
+        return self.start + self.skipped + dt.timedelta(seconds=elapsed)
+
+    def advance(self, delta):
+        self.skipped += delta
+
+
+clock = Clock()
+
+
+def set_clock(new):
+    global clock
+    clock = new
+
+
 def now():
-    return dt.datetime.now(utc)
+    return clock.now()
+
+
+# Calendar day -> (dawn, nightfall); Worked out once for each day
+_sun = {}
+
+
+def sun_times(day):
+    try:
+        return _sun[day]
+    except KeyError:
+        pass
+    try:
+        night = L.night(date=day)[0]
+    except AstralError:
+        # Midsummer; The sky never gets fully dark, so call it day until midnight
+        night = dt.datetime.combine(day + dt.timedelta(days=1), dt.time(), utc)
+    _sun[day] = (L.dawn(date=day), night)
+    return _sun[day]
 
 
-def is_day():
-    return L.dawn() < now() < L.night()[0]
+def is_day(when=None):
+    when = when or now()
+    dawn, night = sun_times(when.date())
+    return dawn < when < night
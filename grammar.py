@@ -2,39 +2,54 @@
 Function library for grammatical correctness
 """
 
+# Article for each start of a word; Only the first two letters ever matter
+_articles = {}
+
 
 # Given grammar and a number, return the appropriate singular or plural form
 def pluralize(n, p="s", s="", w=""):
-    return w + {True: p, False: s}[n != 1]
+    return w + (p if n != 1 else s)
+
+
+def article(loword):
+    """Return "a" or "an" for a lowercase word"""
+    start = loword[:2]
+    try:
+        return _articles[start]
+    except KeyError:
+        pass
+    if start[0] in "aeiou" or (start[0] == "y" and start[1:] and start[1] not in "aeiou"):
+        a = "an"
+    else:
+        a = "a"
+    _articles[start] = a
+    return a
 
 
 def get_a(word, include=False):
     word = word.lstrip()
-    loword = word.lower()
-    b = (" " + word) if include else ""
-    if loword[0] in "aeiou" or (loword[0] == "y" and loword[1] not in "aeiou"):
-        return "an" + b
-    else:
-        return "a" + b
+    a = article(word.lower())
+    return a + " " + word if include else a
+
+
+def get_a_many(words, include=False):
+    """get_a() for every word of WORDS, as a list"""
+    return [get_a(word, include) for word in words]
 
 
 def sequence_words(words, o=""):
-    o1 = ""
+    """Join WORDS into a phrase such as "a, b, and c", skipping any Nones"""
     if type(words) != list:
         return str(words)
-    while None in words:
-        words.remove(None)
-    words = [str(word) for word in words]
-    if len(words) == 0:
-        pass
-    elif len(words) == 1:
-        o += "{}".format(words.pop(0))
-    elif len(words) > 1:
-        o += "{}".format(words.pop(0))
-        if len(words) > 1:
-            o1 = ", and {}".format(words.pop(-1))
-        else:
-            o1 = " and {}".format(words.pop(-1))
-        for p in words:
-            o += ", {}".format(p)
-    return o + o1
+    words = [str(word) for word in words if word is not None]
+    if len(words) > 2:
+        return o + ", ".join(words[:-1]) + ", and " + words[-1]
+    elif len(words) == 2:
+        return o + words[0] + " and " + words[1]
+    else:
+        return o + "".join(words)
+
+
+def sequence_many(lists, o=""):
+    """sequence_words() for every list of LISTS, as a list"""
+    return [sequence_words(words, o) for words in lists]
@@ -5,3 +5,8 @@ from . import decor
 from . import treasure_core
 from . import weapons
 from . import consumables
+from . import generate
+from . import registry
+from . import table
+from . import codec
+from . import archive
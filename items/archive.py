@@ -0,0 +1,143 @@
+"""
+Append-only archives of many items, for storing loot in bulk.
+
+An archive is a short header followed by one record per item, each a u32 length
+and then the item as encoded by items.codec. Alongside it, "<archive>.idx" holds
+the u64 offset of every record, so any item can be read without scanning; If the
+index is missing or out of date, it is rebuilt by a scan on opening.
+"""
+from struct import Struct
+import os
+
+from numpy import array, fromfile, uint64
+
+from items import codec
+
+MAGIC = b"TMUA"
+VERSION = 1
+
+_head = Struct("<4sH")
+_length = Struct("<I")
+_offset = Struct("<Q")
+
+
+class ArchiveWriter:
+    """Add items to the end of an archive, creating it if needed"""
+
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or not os.path.getsize(path)
+        self.fh = open(path, "ab")
+        if new:
+            self.fh.write(_head.pack(MAGIC, VERSION))
+            open(path + ".idx", "wb").close()
+        else:
+            # Make sure the index covers everything already written, and drop any
+            #     record left half-written by a crash
+            with ArchiveReader(path) as reader:
+                end = reader.end
+            self.fh.truncate(end)
+        self.index = open(path + ".idx", "ab")
+
+    def write(self, item):
+        data = codec.encode(item)
+        pos = self.fh.tell()
+        self.fh.write(_length.pack(len(data)))
+        self.fh.write(data)
+        self.index.write(_offset.pack(pos))
+
+    def extend(self, items):
+        for item in items:
+            self.write(item)
+
+    def close(self):
+        self.fh.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class ArchiveReader:
+    """
+    Read items from an archive. Iterating decodes one item at a time, front to back;
+        Indexing seeks straight to the one item asked for.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fh = open(path, "rb")
+        magic, version = _head.unpack(self.fh.read(_head.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an item archive")
+        if version != VERSION:
+            raise ValueError(f"Unsupported archive version {version}")
+        self.offsets = self._load_index()
+
+    def _load_index(self):
+        size = os.fstat(self.fh.fileno()).st_size
+        try:
+            offsets = fromfile(self.path + ".idx", dtype="<u8")
+        except (OSError, ValueError):
+            offsets = None
+        if offsets is not None:
+            self.end = _head.size
+            if len(offsets) and int(offsets[-1]) + _length.size > size:
+                self.end = None  # Indexes a record the file does not hold
+            elif len(offsets):
+                # The index is good if its last record ends exactly at the end of file
+                self.fh.seek(int(offsets[-1]))
+                (n,) = _length.unpack(self.fh.read(_length.size))
+                self.end = int(offsets[-1]) + _length.size + n
+            if self.end == size:
+                return offsets
+
+        # Missing, stale or damaged; Scan for record boundaries and write it anew
+        found = []
+        pos = _head.size
+        while pos + _length.size <= size:
+            self.fh.seek(pos)
+            (n,) = _length.unpack(self.fh.read(_length.size))
+            if pos + _length.size + n > size:
+                break  # A record cut short, by a crash during writing
+            found.append(pos)
+            pos += _length.size + n
+        self.end = pos
+        offsets = array(found, dtype=uint64)
+        offsets.astype("<u8").tofile(self.path + ".idx")
+        return offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def raw(self, i):
+        """Return the encoded bytes of item I"""
+        self.fh.seek(int(self.offsets[i]))
+        (n,) = _length.unpack(self.fh.read(_length.size))
+        return self.fh.read(n)
+
+    def __getitem__(self, i):
+        return codec.decode(self.raw(i))
+
+    def records(self):
+        """Yield the encoded bytes of every item in order"""
+        self.fh.seek(_head.size)
+        for _ in range(len(self.offsets)):
+            (n,) = _length.unpack(self.fh.read(_length.size))
+            yield self.fh.read(n)
+
+    def __iter__(self):
+        for data in self.records():
+            yield codec.decode(data)
+
+    def close(self):
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
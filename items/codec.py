@@ -0,0 +1,198 @@
+"""
+Compact binary format for single items.
+
+A document is self-describing: it begins with the names of every class, material
+and decor used, and every other value (trait values, component names, text), and
+the item's nodes then refer to those by position. Stored items thus survive
+classes being added or reordered; Only renaming a class breaks them.
+
+Layout (little-endian), for SCHEMA 1:
+    MAGIC, u16 schema
+    classes, materials, decors: u16 count, then (u8 length, utf-8 full name) each
+    values: u16 count, then (u8 tag, payload) each; See _VALUE_TAGS
+    u16 node count, then per node, parents before children:
+        h class, h parent, h slot, h material, f hp, d value, h label,
+        u8 n + n * (h key, B wear) for dmg, then the same for aes,
+        u8 n + n * (h key, h value) for traits, then the same for attributes,
+        u8 n + n * (h class, h material, h applied, h detail) for decor
+All h fields are indices into the tables above, with -1 meaning None.
+"""
+from struct import Struct
+
+from items.registry import full_name, treasure_ids, material_ids, decor_ids, value_ids
+from items.table import AES_KEYS, DMG_KEYS, build_item, node_records
+
+MAGIC = b"TMUD"
+SCHEMA = 1
+
+_u8 = Struct("<B")
+_u16 = Struct("<H")
+_i64 = Struct("<q")
+_f64 = Struct("<d")
+_head = Struct("<4sH")
+_node = Struct("<hhhhfdh")
+_pair = Struct("<hh")
+_wear = Struct("<hB")
+_quad = Struct("<hhhh")
+
+# Types of value that may be stored, and their tags
+_VALUE_TAGS = {str: 0, int: 1, float: 2, bool: 3}
+
+
+class Local:
+    """Numbering of the ids of one registry, local to one document"""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.order = []
+        self.index = {}
+
+    def __call__(self, i):
+        if i < 0:
+            return -1
+        try:
+            return self.index[i]
+        except KeyError:
+            self.index[i] = len(self.order)
+            self.order.append(i)
+            return self.index[i]
+
+    def names(self):
+        out = [_u16.pack(len(self.order))]
+        for i in self.order:
+            name = full_name(self.registry.get(i)).encode()
+            out += [_u8.pack(len(name)), name]
+        return out
+
+    def values(self):
+        out = [_u16.pack(len(self.order))]
+        for i in self.order:
+            v = value_ids.get(i)
+            tag = _VALUE_TAGS[type(v)]
+            out.append(_u8.pack(tag))
+            if tag == 0:
+                v = v.encode()
+                out += [_u16.pack(len(v)), v]
+            elif tag == 2:
+                out.append(_f64.pack(v))
+            else:
+                out.append(_i64.pack(v))
+        return out
+
+
+def encode(item):
+    """Return ITEM, and everything it is made of, as bytes"""
+    cls, mat, dec, val = (
+        Local(treasure_ids),
+        Local(material_ids),
+        Local(decor_ids),
+        Local(value_ids),
+    )
+    dmg_keys = [val(value_ids.id(k)) for k in DMG_KEYS]
+    aes_keys = [val(value_ids.id(k)) for k in AES_KEYS]
+
+    body = []
+    recs = node_records(item)
+    body.append(_u16.pack(len(recs)))
+    for c, parent, slot, m, hp, value, label, dmg, aes, traits, attrs, decor in recs:
+        body.append(_node.pack(cls(c), parent, val(slot), mat(m), hp, value, val(label)))
+        for keys, wear in ((dmg_keys, dmg), (aes_keys, aes)):
+            body.append(_u8.pack(len(wear)))
+            body += [_wear.pack(k, w) for k, w in zip(keys, wear)]
+        for pairs in (traits, attrs):
+            body.append(_u8.pack(len(pairs)))
+            body += [_pair.pack(val(k), val(v)) for k, v in pairs]
+        body.append(_u8.pack(len(decor)))
+        body += [_quad.pack(dec(d), mat(m), mat(a), val(t)) for d, m, a, t in decor]
+
+    head = [_head.pack(MAGIC, SCHEMA)] + cls.names() + mat.names() + dec.names()
+    return b"".join(head + val.values() + body)
+
+
+class _Reader:
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def take(self, fmt):
+        out = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return out
+
+    def raw(self, n):
+        out = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return out
+
+    def names(self, registry):
+        # Return process-wide ids of the named entries, in document order
+        (n,) = self.take(_u16)
+        out = []
+        for _ in range(n):
+            (length,) = self.take(_u8)
+            out.append(registry.find(self.raw(length).decode()))
+        return out
+
+    def values(self):
+        (n,) = self.take(_u16)
+        out = []
+        for _ in range(n):
+            (tag,) = self.take(_u8)
+            if tag == 0:
+                (length,) = self.take(_u16)
+                v = self.raw(length).decode()
+            elif tag == 2:
+                (v,) = self.take(_f64)
+            else:
+                (v,) = self.take(_i64)
+                v = bool(v) if tag == 3 else v
+            out.append(value_ids.id(v))
+        return out
+
+
+def decode(data):
+    """Rebuild an item from bytes made by encode()"""
+    r = _Reader(data)
+    magic, schema = r.take(_head)
+    if magic != MAGIC:
+        raise ValueError("Not an encoded item")
+    if schema != SCHEMA:
+        raise ValueError(f"Unsupported item schema version {schema}")
+
+    # Each ends in -1, so that a stored -1 (None) maps to -1 as well
+    classes = r.names(treasure_ids) + [-1]
+    mats = r.names(material_ids) + [-1]
+    decors = r.names(decor_ids) + [-1]
+    vals = r.values() + [-1]
+
+    (count,) = r.take(_u16)
+    recs = []
+    for _ in range(count):
+        c, parent, slot, m, hp, value, label = r.take(_node)
+        wear = []
+        for keys in (DMG_KEYS, AES_KEYS):
+            (n,) = r.take(_u8)
+            got = {}
+            for _ in range(n):
+                k, w = r.take(_wear)
+                got[value_ids.get(vals[k])] = w
+            wear.append(tuple(got.get(key, 0) for key in keys))
+        pairs = []
+        for _ in range(2):
+            (n,) = r.take(_u8)
+            rows = (r.take(_pair) for _ in range(n))
+            pairs.append(tuple((vals[k], vals[v]) for k, v in rows))
+        (n,) = r.take(_u8)
+        decor = tuple(
+            (decors[d], mats[dm], mats[a], vals[t])
+            for d, dm, a, t in (r.take(_quad) for _ in range(n))
+        )
+        recs.append(
+            (classes[c], parent, vals[slot], mats[m], hp, value, vals[label])
+            + tuple(wear)
+            + tuple(pairs)
+            + (decor,)
+        )
+    return build_item(recs)
@@ -1,6 +1,6 @@
 from items.treasure_core import TreasureObject
 from items import materials, decor
-from selection import choose_from
+from selection import choose_from, choose_one
 from . import fluid
 
 
@@ -12,11 +12,17 @@ Labels = [
 ]
 
 
-def wine_label():
+def wine_label(rng=None):
     brands = ["O'Malley's", "Steady Hand McDuff's", "Undertaker", "Trés Comas"]
     names = ["Finest", "Special Reserve", "Dry", "VSOP"]
     years = range(1911, 2003)
-    return " ".join([choose_from(brands)[0], choose_from(names)[0], str(choose_from(years)[0])])
+    return " ".join(
+        [
+            choose_from(brands, rng=rng)[0],
+            choose_from(names, rng=rng)[0],
+            str(choose_from(years, rng=rng)[0]),
+        ]
+    )
 
 
 ############
@@ -134,22 +140,25 @@ class BottledLiquid(TreasureObject):
     TreasureType = "container"
     primary = "Vessel"
 
-    def __init__(self, *arg, content=None, label=None, **kw):
-        super().__init__(*arg, **kw)
+    def __init__(self, *arg, content=None, label=None, rng=None, **kw):
+        super().__init__(*arg, rng=rng, **kw)
         self.dictComp["Content"] = content
         if label is True:
-            label = choose_from(Labels)[0]
+            label = choose_one(Labels, rng)
         if label:
             self.decor.append(decor.Label(text=label))
 
 
-def bottle_water():
-    return BottledLiquid(content=fluid.Water(), label="Water")
+def bottle_water(rng=None):
+    return BottledLiquid(content=fluid.Water(rng=rng), label="Water", rng=rng)
 
 
-def bottle_wine():
-    return BottledLiquid(content=fluid.Wine(), label=wine_label())
+def bottle_wine(rng=None):
+    return BottledLiquid(content=fluid.Wine(rng=rng), label=wine_label(rng), rng=rng)
 
 
-def bottle_potion():
-    return BottledLiquid(content=fluid.Potion(), label=True)
+def bottle_potion(rng=None):
+    return BottledLiquid(content=fluid.Potion(rng=rng), label=True, rng=rng)
+
+
+bottles = [bottle_water, bottle_wine, bottle_potion]
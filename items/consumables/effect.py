@@ -1,23 +1,42 @@
 import datetime as dt
+from heapq import heappop, heappush
+from itertools import count
+
+import dungeontime
+
+ZERO = dt.timedelta(0)
 
 
 class Effect:
+    __slots__ = (
+        "time_start",
+        "tick_last",
+        "_duration",
+        "_interval",
+        "strength",
+        "subject",
+        "active",
+    )
+
     verb = "is experiencing effects"
 
     time_mult = 1
     time_max = 1000
 
-    def __init__(self, subject, duration, interval=0, strength=1):
-        self.time_start = dt.datetime.now()
+    def __init__(self, subject, duration, interval=0, strength=1, scheduler=None):
+        self.time_start = dungeontime.now()
         self.tick_last = self.time_start
         self._duration = min(self.time_max, duration or 1000) * self.time_mult
         self._interval = interval or self._duration / 5
 
         self.strength = strength
+        self.active = True
 
         self.subject = subject
         subject.effects.append(self)
         self.applied()
+        if scheduler is not None:
+            scheduler.add(self)
 
     @property
     def duration(self):
@@ -31,24 +50,35 @@ class Effect:
     def time_end(self):
         return self.time_start + self.duration
 
+    @property
+    def next_due(self):
+        """When this Effect next needs attention: Its next tick, or its expiry"""
+        return min(self.tick_last + self.interval, self.time_end)
+
     def ticks_due(self, since=None, to=None):
+        # Intervals which have ended strictly between the last tick and now (or the end)
         last = since or self.tick_last
-        now = to or dt.datetime.now()
-        ticks = 0
-        while last + (self.interval * (ticks + 1)) < min(now, self.time_end):
-            ticks += 1
-        return ticks
+        now = to or dungeontime.now()
+        span = min(now, self.time_end) - last
+        if span <= ZERO:
+            return 0
+        ticks, rest = divmod(span, self.interval)
+        return ticks if rest else ticks - 1
 
-    def do_ticks(self):
+    def do_ticks(self, now=None):
+        if not self.active:
+            return
         last = self.tick_last
-        now = dt.datetime.now()
+        now = now or dungeontime.now()
         ticks = self.ticks_due(last, now)
         for i in range(ticks):
             self.tick()
+        # Move on by whole intervals only, so no part of one is lost between calls
+        self.tick_last = last + self.interval * ticks
         if now > self.time_end:
+            self.active = False
             self.dispersed()
             self.subject.effects.remove(self)
-        self.tick_last = now
 
     # Following methods are to be overwritten to actually do things
 
@@ -63,3 +93,34 @@ class Effect:
     def tick(self):
         """Called for each time an Interval passes (in clusters)"""
         pass
+
+
+class Scheduler:
+    """
+    Keeps active Effects in a heap, ordered by when each is next due, so that a run
+        only wakes the Effects which actually have a tick or expiry to deal with.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self._order = count()  # Breaks ties between Effects due at the same time
+
+    def __len__(self):
+        return len(self.heap)
+
+    def add(self, effect):
+        heappush(self.heap, (effect.next_due, next(self._order), effect))
+
+    def run(self, now=None):
+        """Bring every Effect due before NOW up to date; Return how many were woken"""
+        now = now or dungeontime.now()
+        woken = 0
+        while self.heap and self.heap[0][0] < now:
+            _, _, effect = heappop(self.heap)
+            if not effect.active:
+                continue  # Already expired, by some other call to do_ticks()
+            effect.do_ticks(now)
+            woken += 1
+            if effect.active:
+                self.add(effect)
+        return woken
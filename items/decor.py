@@ -3,12 +3,14 @@ DECOR is a stylistic modifier that adds MULTIPLIED VALUE of a material.
 An example: Woven leather strips, due to the necessary labor increase, make a tool handle far more luxurious than a crude leather wrapping.
 Decor has no impact on stats.
 """
-from selection import choose_from
+from selection import choose_one
 from items import materials
-# from .treasure_core import TreasureObject
+from items.treasure_core import Compact
 
 
-class Decor:
+class Decor(metaclass=Compact):
+    __slots__ = ("applied_to", "material")
+
     value_add = 1
     adj = "Decorated"
     removable = False  # Can it be removed by hand, without tools?
@@ -19,12 +21,15 @@ class Decor:
     # These are the only materials this can GO ON (Blank is ANY)
     material_restrict = []
 
-    def __init__(self, applied=None, material=None):
+    # Name of the one instance attribute holding extra detail, such as text, if any
+    detail = None
+
+    def __init__(self, applied=None, material=None, rng=None):
         self.applied_to = applied
         if material:
             self.material = material
         elif self.materials:
-            self.material = choose_from(self.materials)[0]
+            self.material = choose_one(self.materials, rng)
         else:
             self.material = None
 
@@ -122,7 +127,10 @@ class Basket(Decor):
 class Color(Decor):
     """Paint, dye, stain..."""
 
+    __slots__ = ("color",)
+
     adj = "Painted"
+    detail = "color"
     material_restrict = materials.Wood.all + materials.Textile.all
     colors = [
         ["red", "crimson", "scarlet", "ruby"],
@@ -135,9 +143,9 @@ class Color(Decor):
         ["black", "ebony"],
     ]
 
-    def __init__(self, *a):
-        super().__init__(*a)
-        self.color = choose_from(self.colors)[0]
+    def __init__(self, *a, rng=None, **kw):
+        super().__init__(*a, rng=rng, **kw)
+        self.color = choose_one(self.colors, rng)
 
     def as_pverb(self):
         verb = "painted"
@@ -154,7 +162,10 @@ class Color(Decor):
 class Signature(Decor):
     """Signed by someone important"""
 
+    __slots__ = ("text",)
+
     adj = "Signed"
+    detail = "text"
 
     def __init__(self, *a, signatory=None, **kw):
         super().__init__(*a, **kw)
@@ -172,8 +183,11 @@ class Signature(Decor):
 class Label(Decor):
     """A small tag is attached"""
 
+    __slots__ = ("text",)
+
     adj = "Labelled"
     removable = True
+    detail = "text"
 
     def __init__(self, *a, text=None, **kw):
         super().__init__(*a, **kw)
@@ -0,0 +1,79 @@
+"""
+Bulk loot generation. Rather than paying for NumPy once per trait, material and
+wear roll of every object, all of the randomness for a batch is drawn up front in
+large blocks, and the objects are then assembled from it.
+
+For parallel runs, every object gets its own stream, spawned from the run seed by
+its index; Any single object can then be rebuilt from (seed, index) alone, no
+matter how the run was split between processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from numpy import random as npr
+
+from selection import AliasTable, Variates, compile_choices
+
+
+def _as_table(cls_or_table):
+    # Classes and factory functions are used directly; Anything else is a Choices tree
+    if callable(cls_or_table) and type(cls_or_table) != AliasTable:
+        return None
+    if type(cls_or_table) != AliasTable:
+        cls_or_table = compile_choices(cls_or_table)
+    return cls_or_table
+
+
+def item_rng(seed, index):
+    """Return the Generator for object INDEX of the run seeded with SEED"""
+    return npr.default_rng(npr.SeedSequence(seed, spawn_key=(index,)))
+
+
+def generate_item(cls_or_table, seed, index):
+    """Rebuild object INDEX of a run made by generate_parallel(); See there"""
+    rng = item_rng(seed, index)
+    table = _as_table(cls_or_table)
+    factory = table.draw(rng) if table else cls_or_table
+    return factory(rng=rng)
+
+
+def generate_batch(cls_or_table, n, rng=None):
+    """
+    Return a list of N new objects.
+    CLS_OR_TABLE may be a class (or factory function taking RNG), or a Choices
+        tree of them (such as weapons.weapons), or an AliasTable compiled from one;
+        In the latter cases, the class of every object is drawn in a single call.
+    RNG is a numpy Generator; If not given, a fresh one is used.
+    """
+    rng = npr.default_rng() if rng is None else rng
+
+    table = _as_table(cls_or_table)
+    if table:
+        classes = table.sample(n, rng)
+    else:
+        classes = [cls_or_table] * n
+
+    stream = Variates(rng)
+    return [cls(rng=stream) for cls in classes]
+
+
+def _generate_range(cls_or_table, seed, start, stop):
+    return [generate_item(cls_or_table, seed, i) for i in range(start, stop)]
+
+
+def generate_parallel(cls_or_table, n, seed, workers=None, chunk=256):
+    """
+    Return a list of N new objects, built across a pool of WORKERS processes.
+    The result depends only on SEED, and object i is always identical to
+        generate_item(cls_or_table, seed, i).
+    """
+    workers = workers or os.cpu_count() or 1
+    out = []
+    with ProcessPoolExecutor(workers) as pool:
+        jobs = [
+            pool.submit(_generate_range, cls_or_table, seed, i, min(i + chunk, n))
+            for i in range(0, n, chunk)
+        ]
+        for job in jobs:
+            out += job.result()
+    return out
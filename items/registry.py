@@ -0,0 +1,77 @@
+"""
+Numbering of everything an item can be made of, so that items can be stored as
+plain integers. Classes are numbered by their full name, so the same code always
+gives the same numbers; Classes defined after the first lookup are numbered after
+all the rest.
+"""
+from items import materials, decor
+from items.treasure_core import TreasureObject
+
+
+def full_name(cls):
+    return cls.__module__ + "." + cls.__qualname__
+
+
+class Registry:
+    """Two-way mapping between objects and small integers; None is always -1"""
+
+    def __init__(self, base=None):
+        self.base = base
+        self.entries = []
+        self.ids = {}
+        self.names = {}
+
+    def _fill(self):
+        found = []
+        todo = [self.base]
+        while todo:
+            cls = todo.pop()
+            found.append(cls)
+            todo += cls.__subclasses__()
+        for cls in sorted(set(found), key=full_name):
+            self.add(cls)
+
+    def add(self, obj):
+        # Keyed with the type as well, so that 1, 1.0 and True stay apart
+        self.ids[(type(obj), obj)] = len(self.entries)
+        if self.base:
+            self.names[full_name(obj)] = len(self.entries)
+        self.entries.append(obj)
+        return len(self.entries) - 1
+
+    def id(self, obj):
+        if obj is None:
+            return -1
+        try:
+            return self.ids[(type(obj), obj)]
+        except KeyError:
+            if self.base and not self.entries:
+                self._fill()
+                return self.id(obj)
+            return self.add(obj)
+
+    def get(self, i):
+        if i < 0:
+            return None
+        if self.base and not self.entries:
+            self._fill()
+        return self.entries[i]
+
+    def find(self, name):
+        """Return the id of the class with the given full name"""
+        if self.base and not self.entries:
+            self._fill()
+        try:
+            return self.names[name]
+        except KeyError:
+            raise KeyError(f"No class named {name}") from None
+
+    def __len__(self):
+        return len(self.entries)
+
+
+treasure_ids = Registry(TreasureObject)
+material_ids = Registry(materials.Material)
+decor_ids = Registry(decor.Decor)
+# Everything else: Trait and attribute values, component names, label text...
+value_ids = Registry()
@@ -0,0 +1,264 @@
+"""
+Columnar storage for large numbers of items. Every object in an item's tree is one
+row (a "node"), and all nodes of all items are kept in a handful of NumPy arrays;
+Full TreasureObjects are only rebuilt when a single item is asked for.
+"""
+from numpy import array, flatnonzero, float32, int16, int32, uint8, zeros
+
+from items import materials
+from items.registry import treasure_ids, material_ids, decor_ids, value_ids
+
+DMG_KEYS = list(materials.Material.dmg_FX)
+AES_KEYS = list(materials.Material.aes_FX)
+
+
+def node_records(item, parent=-1, slot=None, out=None):
+    """
+    Flatten the tree of ITEM into a list of plain tuples, parents before children:
+        (class, parent, slot, material, hp, value, label, dmg, aes, traits, attrs, decor)
+    Everything but hp and value is an integer id from items.registry.
+    """
+    out = [] if out is None else out
+    here = len(out)
+    if item is None:
+        out.append((-1, parent, value_ids.id(slot), -1, 0, 0, -1, (), (), (), (), ()))
+        return out
+
+    out.append(
+        (
+            treasure_ids.id(type(item)),
+            parent,
+            value_ids.id(slot),
+            material_ids.id(getattr(item, "_material", None)),
+            item.hp,
+            item.Value,
+            value_ids.id(item.TreasureLabel),
+            tuple(min(255, max(0, int(item.dmg.get(k, 0)))) for k in DMG_KEYS),
+            tuple(min(255, max(0, int(item.aes.get(k, 0)))) for k in AES_KEYS),
+            tuple(
+                (value_ids.id(k), value_ids.id(v)) for k, v in item.dictTrait.items()
+            ),
+            tuple(
+                (value_ids.id(k), value_ids.id(v))
+                for k, vs in item.dictAttr.items()
+                for v in vs
+            ),
+            tuple(
+                (
+                    decor_ids.id(type(d)),
+                    material_ids.id(d.material),
+                    material_ids.id(d.applied_to),
+                    value_ids.id(getattr(d, d.detail) if d.detail else None),
+                )
+                for d in item.decor
+            ),
+        )
+    )
+    for name, comp in item.dictComp.items():
+        node_records(comp, here, name, out)
+    return out
+
+
+def build_item(records):
+    """Rebuild the TreasureObject tree described by RECORDS; See node_records()"""
+    nodes = []
+    for cls, parent, slot, mat, hp, val, label, dmg, aes, traits, attrs, dec in records:
+        cls = treasure_ids.get(cls)
+        if cls is None:
+            obj = None
+        else:
+            obj = cls.__new__(cls)
+            obj.touch()
+            obj.dictAttr = {k: [] for k in cls.attrs}
+            obj.dictTrait = {}
+            obj.dictComp = {}
+            obj.adjectives = []
+            obj.decor = []
+            if mat >= 0:
+                obj._material = material_ids.get(mat)
+            obj.Value = val
+            obj.TreasureLabel = value_ids.get(label)
+            obj.hp = hp
+            obj.dmg = dict(zip(DMG_KEYS, dmg))
+            obj.aes = dict(zip(AES_KEYS, aes))
+            for k, v in traits:
+                obj.dictTrait[value_ids.get(k)] = value_ids.get(v)
+            for k, v in attrs:
+                obj.dictAttr.setdefault(value_ids.get(k), []).append(value_ids.get(v))
+            for d_cls, d_mat, d_applied, d_text in dec:
+                d_cls = decor_ids.get(d_cls)
+                d = d_cls.__new__(d_cls)
+                d.material = material_ids.get(d_mat)
+                d.applied_to = material_ids.get(d_applied)
+                if d_cls.detail:
+                    setattr(d, d_cls.detail, value_ids.get(d_text))
+                obj.decor.append(d)
+        if parent >= 0:
+            nodes[parent].dictComp[value_ids.get(slot)] = obj
+        nodes.append(obj)
+
+    # Anything with derived state (such as the damage of a Weapon) works it out again
+    for obj in reversed(nodes):
+        if obj is not None and hasattr(obj, "calc_damage"):
+            obj.damage = 0
+            obj.calc_damage()
+    return nodes[0]
+
+
+class ItemTable:
+    """
+    A struct-of-arrays store of items. Per node:
+        cls, material, parent, slot, label: int16/int32 ids (see items.registry)
+        hp, value: float32
+        dmg, aes: uint8 wear, one column per key of Material.dmg_FX / aes_FX
+    Traits, attributes and decor are ragged, and stored flat, with per-node offsets.
+    Nodes of item i are rows roots[i] to roots[i + 1].
+    Columns double in length when full, so only the first USED items, and the rows
+    they reach, are in use.
+    Indexing returns a freshly built TreasureObject; Changes to it are not stored.
+    """
+
+    # Node columns, with their index in a node record
+    columns = (
+        ("cls", 0),
+        ("parent", 1),
+        ("slot", 2),
+        ("material", 3),
+        ("hp", 4),
+        ("value", 5),
+        ("label", 6),
+        ("dmg", 7),
+        ("aes", 8),
+    )
+
+    def __init__(self, items=(), capacity=64):
+        self.used = 0
+        self.roots = zeros(capacity + 1, int32)
+
+        self.cls = zeros(capacity, int16)
+        self.material = zeros(capacity, int16)
+        self.parent = zeros(capacity, int32)
+        self.slot = zeros(capacity, int32)
+        self.label = zeros(capacity, int32)
+        self.hp = zeros(capacity, float32)
+        self.value = zeros(capacity, float32)
+        self.dmg = zeros((capacity, len(DMG_KEYS)), uint8)
+        self.aes = zeros((capacity, len(AES_KEYS)), uint8)
+
+        self.trait_start = zeros(capacity + 1, int32)
+        self.traits = zeros((capacity, 2), int32)
+        self.attr_start = zeros(capacity + 1, int32)
+        self.attrs = zeros((capacity, 2), int32)
+        self.decor_start = zeros(capacity + 1, int32)
+        self.decor = zeros((capacity, 4), int32)
+
+        self.extend(items)
+
+    def __len__(self):
+        return self.used
+
+    @staticmethod
+    def _fit(col, n):
+        """COL, or a copy of it at least twice as long if it has fewer than N rows"""
+        if n <= len(col):
+            return col
+        new = zeros((max(n, 2 * len(col)),) + col.shape[1:], col.dtype)
+        new[: len(col)] = col
+        return new
+
+    def _ragged(self, offsets, name, node, lists, width):
+        """Write LISTS, the ragged rows of the nodes from NODE on, into column NAME"""
+        start = self._fit(getattr(self, offsets), node + len(lists) + 1)
+        a = int(start[node])
+        start[node + 1 : node + len(lists) + 1] = a + array(
+            [len(x) for x in lists], int32
+        ).cumsum()
+        b = int(start[node + len(lists)])
+        col = self._fit(getattr(self, name), b)
+        col[a:b] = array([row for x in lists for row in x], int32).reshape(-1, width)
+        setattr(self, offsets, start)
+        setattr(self, name, col)
+
+    def extend(self, items):
+        """Add ITEMS to the end of the table; Far cheaper per item in large batches"""
+        node = int(self.roots[self.used])
+        recs = []
+        roots = []
+        for item in items:
+            roots.append(node + len(recs))
+            offset = node + len(recs)
+            recs += [
+                (r[0], r[1] + offset if r[1] >= 0 else -1) + r[2:]
+                for r in node_records(item)
+            ]
+        if not recs:
+            return
+        c = list(zip(*recs))
+        end = node + len(recs)
+
+        self.roots = self._fit(self.roots, self.used + len(roots) + 1)
+        self.roots[self.used : self.used + len(roots)] = roots
+        self.roots[self.used + len(roots)] = end
+        self.used += len(roots)
+        for name, k in self.columns:
+            col = self._fit(getattr(self, name), end)
+            col[node:end] = c[k]
+            setattr(self, name, col)
+        self._ragged("trait_start", "traits", node, c[9], 2)
+        self._ragged("attr_start", "attrs", node, c[10], 2)
+        self._ragged("decor_start", "decor", node, c[11], 4)
+
+    def append(self, item):
+        self.extend([item])
+
+    def records(self, i):
+        """The node records of item I, as given by node_records()"""
+        a, b = int(self.roots[i]), int(self.roots[i + 1])
+
+        def rows(start, col, n):
+            return tuple(tuple(r) for r in col[start[n]:start[n + 1]].tolist())
+
+        return [
+            (
+                int(self.cls[n]),
+                int(self.parent[n]) - a if self.parent[n] >= 0 else -1,
+                int(self.slot[n]),
+                int(self.material[n]),
+                float(self.hp[n]),
+                float(self.value[n]),
+                int(self.label[n]),
+                tuple(self.dmg[n].tolist()),
+                tuple(self.aes[n].tolist()),
+                rows(self.trait_start, self.traits, n),
+                rows(self.attr_start, self.attrs, n),
+                rows(self.decor_start, self.decor, n),
+            )
+            for n in range(a, b)
+        ]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("ItemTable index out of range")
+        return build_item(self.records(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def classes(self):
+        """Class id of every item, as an array; See items.registry.treasure_ids"""
+        return self.cls[self.roots[: self.used]]
+
+    def class_of(self, i):
+        return treasure_ids.get(int(self.cls[self.roots[i]]))
+
+    def where(self, cls):
+        """Indices of all items which are exactly of class CLS"""
+        return flatnonzero(self.classes == treasure_ids.id(cls))
+
+    @property
+    def nbytes(self):
+        return sum(getattr(v, "nbytes", 0) for v in vars(self).values())
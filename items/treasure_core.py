@@ -1,34 +1,121 @@
-import jsonpickle
-from numpy import random as npr, square
+from bisect import bisect_left
+from itertools import count
+
+from numpy import array, searchsorted, square
 
 from . import materials
-from selection import choose_from
+from selection import choose_from, choose_one, compile_choices, randint
+
+# Wear rolled for each damage effect of a new object; Lower values more likely
+WEAR = compile_choices(list(range(0, 90, 10)), list(square(range(1, 10)))[::-1])
+
+
+# Source of version stamps; Every change anywhere takes a new, higher stamp
+_stamps = count(1)
+
+
+def _seen(stamp):
+    """Move the stamp counter past STAMP, which was given out by another process"""
+    global _stamps
+    following = next(_stamps)
+    _stamps = count(max(following, stamp + 1))
+
+_adj_tables = {}
+
 
-DEBUG = False
+def adjective_table(material):
+    """
+    The adjectives for every damage and aesthetic effect of MATERIAL, as a tuple of
+        (effect dict name, effect, thresholds, adjectives), worked out once per
+        material. An effect value above thresholds[i] (and no higher) earns
+        adjectives[i]; adjectives[0] is blank.
+    """
+    try:
+        return _adj_tables[material]
+    except KeyError:
+        pass
+    table = []
+    for name, fx in (("dmg", material.dmg_FX), ("aes", material.aes_FX)):
+        for k, v in fx.items():
+            desc = [""] + v
+            thresholds = [int((100 / len(desc)) * i) for i in range(len(desc))]
+            table.append((name, k, thresholds, desc))
+    _adj_tables[material] = table = tuple(table)
+    return table
+
+
+def get_adj_batch(items):
+    """Return the adjectives of each of ITEMS, as a list of lists, as get_adj() would"""
+    out = [[] for _ in items]
+    by_material = {}
+    for i, item in enumerate(items):
+        if item.material:
+            by_material.setdefault(item.material, []).append(i)
+
+    for material, idx in by_material.items():
+        for name, k, thresholds, desc in adjective_table(material):
+            values = array([getattr(items[i], name)[k] for i in idx])
+            for i, n in zip(idx, searchsorted(thresholds, values).tolist()):
+                if n > 1:
+                    out[i].append(desc[n - 1])
+    return out
 
 
-def shuffle(obj, feat=None, r=False):
+def shuffle(obj, feat=None, r=False, rng=None):
     for attr, (amin, amax, poss) in obj.attrs.items():
         if attr == feat or not feat:
-            q = npr.randint(amin, amax + 1)
-            selected = choose_from(poss, q)
+            q = randint(amin, amax + 1, rng)
+            selected = choose_from(poss, q, rng=rng)
             obj.dictAttr[attr] = selected
     for trait, poss in obj.traits.items():
         if trait == feat or not feat:
-            selected = choose_from(poss)[0]
+            selected = choose_one(poss, rng)
             obj.dictTrait[trait] = selected
     for dec in obj.additions:
-        selected = choose_from(dec)[0]
+        selected = choose_one(dec, rng)
         if selected and (
             obj.material in selected.material_restrict or not selected.material_restrict
         ):
-            obj.decor.append(selected(obj.material))
+            obj.decor.append(selected(obj.material, rng=rng))
+    obj.touch()
     if r:
         for comp, obj2 in obj.dictComp.items():
-            shuffle(obj2, feat, r)
+            shuffle(obj2, feat, r, rng)
+
+
+class Compact(type):
+    """
+    Gives every class an empty __slots__ unless it declares its own, so that no
+        instance carries a __dict__. Subclasses which add instance attributes must
+        name them in __slots__.
+    Also gives every class a frozenset of its class_flags, to be shared by all
+        instances which have not been given flags of their own.
+    """
+
+    def __new__(mcs, name, bases, namespace, **kw):
+        namespace.setdefault("__slots__", ())
+        cls = super().__new__(mcs, name, bases, namespace, **kw)
+        cls.shared_flags = frozenset(getattr(cls, "class_flags", ()))
+        return cls
+
 
+class TreasureObject(metaclass=Compact):
+    __slots__ = (
+        "dictAttr",
+        "dictTrait",
+        "dictComp",
+        "adjectives",
+        "decor",
+        "_flags",
+        "_material",
+        "Value",
+        "TreasureLabel",
+        "hp",
+        "dmg",
+        "aes",
+        "_version",
+    )
 
-class TreasureObject:
     attrs = {}
     # ATTRIBUTES: Flavor modifiers, no effect; Any number of a certain attribute type
     # A value in attrs MUST be: a TUPLE or LIST containing: INT1, INT2, LIST1
@@ -52,19 +139,18 @@ class TreasureObject:
     # For example, the blade of a sword, or the bottle of a beverage
     primary = None
 
-    def __init__(self, *args, material=None, **kwargs):
+    def __init__(self, *args, material=None, rng=None, **kwargs):
+        # RNG, if given, is the source of all randomness for this object and its parts
+        self._version = next(_stamps)
         self.dictAttr = {}
         self.dictTrait = {}
         self.dictComp = {}
         self.adjectives = []
         self.decor = []
 
-        # Going to experiment with Dwarf Fortress style tokens here
-        self.flags = set(self.class_flags)
-
         try:
             self._material = (
-                (material or choose_from(self.materials)[0]) if self.materials else None
+                (material or choose_one(self.materials, rng)) if self.materials else None
             )
         except:
             pass
@@ -74,14 +160,7 @@ class TreasureObject:
 
         self.hp = 100
 
-        dmg = list(range(0, 90, 10))
-        chance = list(square(range(1, 10)))
-        chance.reverse()  # Lower values more likely
-
-        self.dmg = {
-            x: choose_from(dmg, probability=chance)[0]
-            for x in list(materials.Material.dmg_FX)
-        }
+        self.dmg = {x: WEAR.draw(rng) for x in list(materials.Material.dmg_FX)}
         self.aes = {
             x: 0
             # x: choose_from(dmg, probability=chance)[0]
@@ -90,14 +169,27 @@ class TreasureObject:
 
         for comp, v in self.components.items():
             if type(v) == list:
-                choice = choose_from(v)[0]
+                choice = choose_one(v, rng)
                 if not choice:
                     continue
             else:
                 choice = v
-            c = choice(*args, **kwargs)
+            c = choice(*args, rng=rng, **kwargs)
             self.dictComp[comp] = c
-        shuffle(self)
+        shuffle(self, rng=rng)
+
+    @property
+    def flags(self):
+        # Going to experiment with Dwarf Fortress style tokens here
+        # Shared with the class (and so read-only) until assigned a set of its own
+        try:
+            return self._flags
+        except AttributeError:
+            return self.shared_flags
+
+    @flags.setter
+    def flags(self, value):
+        self._flags = set(value)
 
     @property
     def material(self):
@@ -109,29 +201,48 @@ class TreasureObject:
         targ = other or self
 
         if targ.material:
-            for k, v in targ.material.dmg_FX.items():
-                desc = [""] + v
-                thresholds = [int((100 / len(desc)) * i) for i in range(len(desc))]
-                adj = ""
-                for i in range(len(desc)):
-                    if targ.dmg[k] > thresholds[i]:
-                        adj = desc[i]
-                adjs.append(adj)
-
-            for k, v in targ.material.aes_FX.items():
-                desc = [""] + v
-                thresholds = [int((100 / len(desc)) * i) for i in range(len(desc))]
-                adj = ""
-                for i in range(len(desc)):
-                    if targ.aes[k] > thresholds[i]:
-                        adj = desc[i]
-                adjs.append(adj)
-
-        while "" in adjs:
-            adjs.remove("")
+            for name, k, thresholds, desc in adjective_table(targ.material):
+                # Count of thresholds below the value, and so the last one passed
+                n = bisect_left(thresholds, getattr(targ, name)[k])
+                if n > 1:
+                    adjs.append(desc[n - 1])
 
         return adjs
 
+    def touch(self):
+        """Mark this object as changed; Needed after changing its state directly"""
+        self._version = next(_stamps)
+
+    def __setstate__(self, state):
+        # Stamps loaded from a pickle may be far above this process's counter
+        for name, value in (state[1] if state else {}).items():
+            setattr(self, name, value)
+        _seen(getattr(self, "_version", 0))
+
+    def revision(self):
+        """A stamp which grows whenever this object, or any part of it, is changed"""
+        v = getattr(self, "_version", 0)
+        for comp in self.dictComp.values():
+            if comp is not None:
+                v = max(v, comp.revision())
+        return v
+
+    def set_wear(self, effect, value):
+        """Set the level of a damage or aesthetic effect, such as phys or blood"""
+        if effect in self.dmg:
+            self.dmg[effect] = value
+        else:
+            self.aes[effect] = value
+        self.touch()
+
+    def add_decor(self, dec):
+        self.decor.append(dec)
+        self.touch()
+
+    def remove_decor(self, dec):
+        self.decor.remove(dec)
+        self.touch()
+
     def weight(self):
         w = 0
         try:
@@ -143,11 +254,13 @@ class TreasureObject:
         return w
 
     def serialize(self):
-        return jsonpickle.encode(self)
+        """Return this object as bytes; See items.codec"""
+        from items import codec
+
+        return codec.encode(self)
 
     def save(self, fname):
-        jsonpickle.set_encoder_options("simplejson", indent=4 if DEBUG else 0)
-        with open(fname, "w") as fh:
+        with open(fname, "wb") as fh:
             fh.write(self.serialize())
 
     def clone(self, fulldata=True):
@@ -171,9 +284,11 @@ class TreasureObject:
     def __setitem__(self, key, value):
         keys = list(self.components)
         self.dictComp[keys[key]] = value
+        self.touch()
 
     def __delitem__(self, key):
         keys = list(self.components)
         comp = self.dictComp.get(keys[key], None)
         if comp:
             del self.dictComp[keys[key]]
+            self.touch()
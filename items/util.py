@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import grammar
 
 # Characters to use for the tree/rail.
@@ -9,26 +11,47 @@ LINE = [" ", "│", "╰", "├", "╼"]
 
 Colorful = False
 
+# How many rendered descriptions (and titles) to keep, most recently used first
+CACHE_SIZE = 1024
+# Text worked out for items, by (id, revision, options); Least recently used first.
+#     Holding only the id, they never keep an item alive; A revision is a stamp on
+#     one of its own parts, so a later item with the same id cannot match it.
+_titles = OrderedDict()
+_renders = OrderedDict()
+
+
+def _cached(cache, key, make, *args):
+    try:
+        cache.move_to_end(key)
+        return cache[key]
+    except KeyError:
+        new = cache[key] = make(*args)
+        if len(cache) > CACHE_SIZE:
+            cache.popitem(last=False)
+        return new
+
 
 def longest_in_list(_list):
-    longest = 0
-    for x in _list:
-        if len(x) > longest:
-            longest = len(x)
-    return longest
+    return max(map(len, _list), default=0)
 
 
 def combine_images(imgs, joint=" "):
     longest = longest_in_list(imgs)
     for img in imgs:
-        while len(img) < longest:
-            img.append(" " * longest_in_list(img))
+        if len(img) < longest:
+            img += [" " * longest_in_list(img)] * (longest - len(img))
     img_composite = [joint.join([p[i] for p in imgs]) for i in range(longest)]
     # return "\n".join(img_composite)
     return img_composite
 
 
 def title_item(item):
+    if hasattr(item, "revision"):
+        return _cached(_titles, (id(item), item.revision()), _title_item, item)
+    return _title_item(item)
+
+
+def _title_item(item):
     if not item:
         return "nothing"
 
@@ -57,103 +80,135 @@ def item_image(item):
     return line_out
 
 
+def wrap_lines(lines, indent, limit=50):
+    """Yield LINES, breaking any longer than LIMIT over as many lines as it takes"""
+    for line in lines:
+        while len(line) > limit:
+            yield line[:limit] + "-"
+            line = " " * indent + "-" + line[limit:]
+        yield line
+
+
 def wrap_text(text, indent, limit=50):
-    for i, line in enumerate(text):
-        if len(line) > limit:
-            text[i:i+1] = [line[:limit] + "-", " " * indent + "-" + line[limit:]]
+    text[:] = wrap_lines(text, indent, limit)
+
+
+def item_lines(item, minimal=False):
+    """Yield the lines describing ITEM itself, without its title or components"""
+    if not item:
+        return
+
+    try:
+        # See if it is a weapon object
+        d = item.calc_damage()
+        dsum = round(sum(d), 2)
+        wgh = item.weight()
+        spd = item.speed()
+    except AttributeError:
+        pass
+    else:
+        yield f"> It does {str([round(i, 2) for i in d])} C/P/S damage for {str(dsum)} ideal-total."
+        yield f"> It has a weight of {str(wgh)} for a speed of {str(spd)}."
+        yield f"> It does {str(round((dsum + spd) / 10, 2))} DPS."
+
+    try:
+        # See if it is part of a weapon object
+        d = item.damage_rating()
+    except AttributeError:
+        pass
+    else:
+        dstr = [str(n) for n in d]
+        if sum(d) > 0:
+            yield f"+ It contributes {dstr} C/P/S damage to its parent."
+
+    if not minimal:
+        # If the function was not told to be minimal, return a few more lines of flavor text
+        traits = item.dictTrait
+        attributes = item.dictAttr
+        additional = item.decor
+        adjectives = item.get_adj()
+
+        # Print object adjectives as a single line
+        if adjectives:
+            yield f"! It is {grammar.sequence_words(adjectives)}."
+
+        # Print object attributes (variable number)
+        for a, v in attributes.items():
+            description = grammar.sequence_words(v)
+            if description != "":
+                yield f"= Its {a.lower()} is {str(description)}."
+
+        # Print object traits (one of each)
+        for a, v in traits.items():
+            yield f"- Its {a.lower()} is {grammar.sequence_words(v)}."
+
+        # Print object embellishments (one of each, as passive verbs)
+        if additional:
+            yield "* It {}.".format(grammar.sequence_words([v.as_pverb() for v in additional]))
+
+
+def iter_description(item, *, top=True, minimal=False, recursive=True, lineset=LINE):
+    """
+    Yield the lines of the description of ITEM one at a time, top down, ready to be
+        joined by '\n's to display hierarchy. Rather than recursing, components
+        wait on a stack along with the rail prefixes for their lines.
+    """
+    # (object, spacer line, first line prefix, other lines prefix, title before, title after)
+    stack = [(item, None, "", "", "This is " if top else "", "." if top else "")]
+    while stack:
+        obj, spacer, first, rest, before, after = stack.pop()
+        if spacer is not None:
+            yield spacer
+
+        components = getattr(obj, "dictComp", None)
+        rail = lineset[1] if components and recursive else lineset[0]
+        yield first + before + title_item(obj) + after
+        for line in wrap_lines(item_lines(obj, minimal), 3, 60):
+            yield rest + rail + line
+
+        if recursive and components:
+            last = len(components) - 1
+            for i, (k, v) in reversed(list(enumerate(components.items()))):
+                prefix_first, prefix_rest = (
+                    (lineset[2] + lineset[4], lineset[0] * 2)
+                    if i == last
+                    else (lineset[3] + lineset[4], lineset[1] + lineset[0])
+                )
+                stack.append(
+                    (
+                        v,
+                        rest + lineset[1],
+                        rest + prefix_first,
+                        rest + prefix_rest,
+                        f"[{i}] Its {k.lower()} is ",
+                        ".",
+                    )
+                )
 
 
-def item_description(item, *, top=True, minimal=False, recursive=True, lineset=LINE):
+def item_description(item, **kw):
     """Return a list of strings, which, when join()ed by '\n's, display hierarchy"""
-    components = getattr(item, "dictComp", None)
-    rail = lineset[1] if components and recursive else lineset[0]
-    line_first = title_item(item)
-    line_out = []
+    return list(iter_description(item, **kw))
 
-    if top:
-        line_first = "This is " + line_first + "."
-
-    if item:
-        try:
-            # See if it is a weapon object
-            d = item.calc_damage()
-            dsum = round(sum(d), 2)
-            wgh = item.weight()
-            spd = item.speed()
-            line_out += [
-                f"> It does {str([round(i, 2) for i in d])} C/P/S damage for {str(dsum)} ideal-total.",
-                f"> It has a weight of {str(wgh)} for a speed of {str(spd)}.",
-                f"> It does {str(round((dsum + spd) / 10, 2))} DPS.",
-            ]
-        except AttributeError:
-            pass
-
-        try:
-            # See if it is part of a weapon object
-            d = item.damage_rating()
-            dstr = [str(n) for n in d]
-            if sum(d) > 0:
-                line_out.append(
-                    f"+ It contributes {dstr} C/P/S damage to its parent."
-                )
-        except AttributeError:
-            pass
-
-        if not minimal:
-            # If the function was not told to be minimal, return a few more lines of flavor text
-            traits = item.dictTrait
-            attributes = item.dictAttr
-            additional = item.decor
-            adjectives = item.get_adj()
-
-            # Print object adjectives as a single line
-            if adjectives:
-                line_out.append(f"! It is {grammar.sequence_words(adjectives)}.")
-
-            # Print object attributes (variable number)
-            for a, v in attributes.items():
-                description = grammar.sequence_words(v)
-                if description != "":
-                    line_out.append(f"= Its {a.lower()} is {str(description)}.")
-
-            # Print object traits (one of each)
-            for a, v in traits.items():
-                line_out.append(f"- Its {a.lower()} is {grammar.sequence_words(v)}.")
-
-            # Print object embellishments (one of each, as passive verbs)
-            # for v in additional:
-            #     line_out.append(f"* It {v.as_pverb()}.")
-            if additional:
-                line_out.append("* It {}.".format(grammar.sequence_words([v.as_pverb() for v in additional])))
-
-    wrap_text(line_out, 3, 60)
-
-    line_out = [rail + line for line in line_out]
-    if line_first:
-        line_out[0:0] = [line_first]
-
-    if recursive and components:
-        for i, v in enumerate(components.items()):
-            line_out.append(lineset[1])
-            prefix_first, prefix_rest = (
-                (lineset[2] + lineset[4], lineset[0] * 2)
-                if i == len(components) - 1
-                else (lineset[3] + lineset[4], lineset[1] + lineset[0])
-            )
-            ret = item_description(
-                v[1], top=False, minimal=minimal, recursive=recursive
-            )
-
-            line_return = [
-                prefix_first + "[{}] Its {} is {}.".format(i, v[0].lower(), ret.pop(0))
-            ]
-            line_return += [prefix_rest + line for line in ret]
-            line_out += line_return
 
-    return line_out
+def write_description(item, sink, **kw):
+    """Write the description of ITEM to SINK, any object with a write() for text"""
+    for line in iter_description(item, **kw):
+        sink.write(line)
+        sink.write("\n")
 
 
-def describe_item(item, minimal=False, norecurse=False, images=False):
+def render_item(item, minimal=False, norecurse=False, images=False):
+    """
+    Return the full description of ITEM as one string. Results are cached by the
+        revision of the item, so looking again at an unchanged item is free.
+    """
+    key = (id(item), item.revision(), minimal, norecurse, images)
+    return _cached(_renders, key, format_item, item, minimal, norecurse, images)
+
+
+def format_item(item, minimal=False, norecurse=False, images=False):
+    """As render_item(), but always worked out anew, and never cached"""
     line_in = item_description(item, minimal=minimal, recursive=not norecurse)
     if images:
         img_in = item_image(item)
@@ -167,5 +222,8 @@ def describe_item(item, minimal=False, norecurse=False, images=False):
     else:
         all_in = line_in
 
-    line_out = "\n".join(all_in)
-    print("\n" + line_out + "\n")
+    return "\n".join(all_in)
+
+
+def describe_item(item, minimal=False, norecurse=False, images=False):
+    print("\n" + render_item(item, minimal, norecurse, images) + "\n")
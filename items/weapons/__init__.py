@@ -1,12 +1,14 @@
-from numpy import add as npadd
+from numpy import add, array, rint, zeros
 
 from . import damage, structure
 from items.treasure_core import TreasureObject
 from items import util
-from selection import choose_from
+from selection import choose_one, compile_choices
 
 
 class Weapon(TreasureObject):
+    __slots__ = ("damage",)
+
     TreasureType = "Generic Weapon"
     BaseType = "weapon"
 
@@ -41,9 +43,9 @@ class Weapon(TreasureObject):
 
     def calc_damage(self):
         d = [0, 0, 0]
-        for comp in self.dictComp:
-            d = npadd(d, self.dictComp[comp].damage_rating(True))
-        self.damage = [round(float(dd), 2) for dd in list(d)]
+        for comp in self.dictComp.values():
+            d = [a + b for a, b in zip(d, comp.damage_rating(True))]
+        self.damage = [round(float(dd), 2) for dd in d]
         return self.damage
 
 
@@ -173,10 +175,31 @@ cleavers = [Axe]
 polearms = [Glaive, MaceCav, Halberd, Pike]
 
 weapons = [swords, bludgeons, cleavers, polearms]
-
-
-def random_weapon():
-    return choose_from((weapons, [len(x) for x in weapons]))[0]
+weapon_table = compile_choices((weapons, [len(x) for x in weapons]))
+
+
+def random_weapon(rng=None):
+    return choose_one(weapon_table, rng)
+
+
+def calc_damage_batch(items):
+    """
+    C/P/S damage of many weapons at once, as an (n, 3) array; Row i holds the same
+        numbers items[i].calc_damage() would give.
+    """
+    rows, base, wear = [], [], []
+    for i, item in enumerate(items):
+        for comp in item.dictComp.values():
+            if isinstance(comp, damage.Damager):
+                rows.append(i)
+                base.append(damage.damage_table(type(comp), comp.material))
+                wear.append(comp.dmg["phys"])
+    table = array(base, float).reshape(-1, 3, 3)
+    wear = (1 - array(wear, float) / 1000)[:, None]
+    d = table[:, :, 0] * wear / 100 * table[:, :, 1] / table[:, :, 2]
+    out = zeros((len(items), 3))
+    add.at(out, rows, rint(d * 100) / 100)
+    return out.round(2)
 
 
 def test_weapon(minimal=False, mat=None, norecurse=False, images=True, text=True):
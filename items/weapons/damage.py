@@ -1,13 +1,44 @@
 """
 Weapon Parts that contribute damage to the weapon. Blades, heads, points, spikes...Anything that can be used to kill.
 """
-from numpy import round
-
 from items import materials, decor
 
 # from treasure_core import TreasureObject, form_out
 from .structure import WPart
 
+DAMAGE_TYPES = ["Crush", "Pierce", "Slice"]
+
+_tables = {}
+
+
+def damage_table(cls, material):
+    """
+    Damage done by an unworn Damager of class CLS made of MATERIAL, worked out once
+        per pair; A tuple of (base, multiplier, divisor) per damage type, C/P/S.
+    The damage of an item is then base * wear / 100 * multiplier / divisor, rounded.
+    """
+    try:
+        return _tables[cls, material]
+    except KeyError:
+        pass
+    try:
+        d = []
+        for i, damage_type in enumerate(DAMAGE_TYPES):
+            base = 0
+            for damage_stat, coeff in cls.type_damage.get(damage_type, {}).items():
+                base += getattr(material, damage_stat) * coeff * cls.size
+            d.append(
+                (
+                    base,
+                    cls.Effectiveness if i in cls.DamageTypesGood else 1,
+                    cls.Effectiveness if i in cls.DamageTypesBad else 1,
+                )
+            )
+    except AttributeError:  # FC: It has been found that this part contributes no damage
+        d = [(0, 1, 1)] * len(DAMAGE_TYPES)
+    _tables[cls, material] = d = tuple(d)
+    return d
+
 
 class Damager(WPart):
     size = 10
@@ -36,30 +67,13 @@ class Damager(WPart):
             self._material = override_material
 
     def damage_rating(self, split=True):
-        # Amount of damage contributed by this component
-        d = []
-        try:  # FC: Assume the part contributes damage
-            # for damage_type, coeffs in self.type_damage.items():
-            for damage_type in ["Crush", "Pierce", "Slice"]:
-                damage = 0
-                # for damage_stat, coeff in self.stat_damage.items():
-                # print(self, damage_type + ":")
-                stats = self.type_damage.get(damage_type, {})
-                for damage_stat, coeff in stats.items():
-                    dmore = getattr(self.material, damage_stat) * coeff * self.size
-                    # print(str(dmore), "from", getattr(self.material, damage_stat), damage_stat, "(" + self.material.__name__ + ")")
-                    damage += dmore
-                damage = damage * (1 - self.dmg["phys"] / 1000)
-                d.append(damage / 100)
-
-            for i in range(len(d)):
-                if i in self.DamageTypesGood:
-                    d[i] *= self.Effectiveness
-                if i in self.DamageTypesBad:
-                    d[i] /= self.Effectiveness
-        except AttributeError:  # FC: It has been found that this part contributes no damage
-            d = [0, 0, 0]
-        d_out = [round(i, 2) for i in d]
+        # Amount of damage contributed by this component; Only wear varies per item
+        wear = 1 - self.dmg["phys"] / 1000
+        d_out = [
+            # Rounded as numpy.round does it, for 2 places
+            round(base * wear / 100 * mult / div * 100) / 100
+            for base, mult, div in damage_table(type(self), self.material)
+        ]
         if not split:
             d_out = sum(d_out)
         return d_out
@@ -0,0 +1,280 @@
+"""
+World persistence: A full snapshot of every Site, then a journal of the changes
+made since, so that saving costs in proportion to what has changed.
+
+    PATH.snap    Pickles: Generation and top-level Sites, a prelude of every
+                 entity, then the attributes of each entity in turn
+    PATH.log     Header, then one length-prefixed record per change
+
+Entities (Sites, Rooms, Creatures, items) are numbered in walk order when the
+snapshot is written, and in order of first appearance in the journal after that;
+Everything else refers to them by number, so no pickle is ever deeper than one
+entity. Items refer to nothing, and are stored whole in the prelude.
+"""
+import io
+import os
+import pickle
+import struct
+
+import roomstore
+import world
+
+MAGIC = b"TMUJ"
+HEADER = struct.Struct("<4sI")  # Magic, generation of the snapshot it follows
+LENGTH = struct.Struct("<I")
+LITERALS = (str, int, float, bool, bytes, type(None))
+
+
+def entities(sites):
+    """Every entity in SITES, in a fixed order"""
+    for site in sites:
+        yield site
+        for room in site.rooms:
+            yield room
+            yield from room.occupants
+            yield from room.floor
+            yield from room.furniture
+        yield from entities(site.sites)
+
+
+def is_shell(obj):
+    """Whether OBJ is pickled as its state alone, rather than whole in the prelude"""
+    return hasattr(obj, "__dict__") or isinstance(obj, roomstore.RoomHandle)
+
+
+def state_of(obj):
+    return obj.__getstate__()
+
+
+def restore(obj, state):
+    try:
+        setstate = obj.__setstate__
+    except AttributeError:
+        obj.__dict__.update(state)
+    else:
+        setstate(state)
+
+
+class _Pickler(pickle.Pickler):
+    def __init__(self, file, ids):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.ids = ids
+
+    def persistent_id(self, obj):
+        try:
+            return self.ids.get(obj)
+        except TypeError:  # Unhashable, so not an entity
+            return None
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, objects):
+        super().__init__(file)
+        self.objects = objects
+
+    def persistent_load(self, pid):
+        return self.objects[pid]
+
+
+class Journal:
+    """Record every change to the world into PATH; Attaches to world.listeners"""
+
+    def __init__(self, path, sites, compact_after=10000):
+        self.path = path
+        self.sites = sites
+        self.compact_after = compact_after
+        # Carry on from any earlier save, so its journal is never taken for ours
+        try:
+            with open(path + ".snap", "rb") as f:
+                self.generation = pickle.load(f)[0]
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.generation = 0
+        self.ids = {}
+        self.next_id = 0
+        # Rooms written out of memory (see roomstore) -> numbers of their floor items
+        #     and furniture, which come back as new objects
+        self.parked = {}
+        self.pending = bytearray()
+        self.count = 0
+        self.log = None
+        world.listeners.append(self)  # First, to follow rooms written out while saving
+        self.snapshot()
+
+    def snapshot(self):
+        """Write out the whole world and start an empty journal after it"""
+        self.pending.clear()  # Already part of the world being written
+        self.generation += 1
+        # Numbered one at a time, so rooms written out during the walk park theirs
+        self.ids = {}
+        self.parked = {}
+        objects = []
+        for obj in entities(self.sites):
+            self.ids[obj] = len(objects)
+            objects.append(obj)
+        self.next_id = len(objects)
+        tmp = self.path + ".snap.tmp"
+        with open(tmp, "wb") as f:
+            top = [self.ids[site] for site in self.sites]
+            pickle.dump((self.generation, top), f, pickle.HIGHEST_PROTOCOL)
+            shells = [obj for obj in objects if is_shell(obj)]
+            prelude = [type(obj) if is_shell(obj) else obj for obj in objects]
+            pickle.dump(prelude, f, pickle.HIGHEST_PROTOCOL)
+            pickler = _Pickler(f, self.ids)
+            for obj in shells:
+                pickler.dump(state_of(obj))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path + ".snap")
+
+        if self.log:
+            self.log.close()
+        self.log = open(self.path + ".log", "wb")
+        self.log.write(HEADER.pack(MAGIC, self.generation))
+        self.log.flush()
+        self.count = 0
+
+    def park(self, event, handle, room):
+        """Keep the numbers of a room's items while it is out of memory"""
+        held = (room.floor, room.furniture)
+        if event == "evict":
+            self.parked[handle] = [[self.ids.pop(item, None) for item in items] for items in held]
+            return
+        for items, numbers in zip(held, self.parked.pop(handle, ())):
+            for item, n in zip(items, numbers):
+                if n is not None:
+                    self.ids[item] = n
+
+    def __call__(self, event, *args):
+        if event in ("evict", "restore"):
+            return self.park(event, *args)
+        if event == "item":
+            # The item itself is known; Record what it has become
+            args += (args[1].serialize(),)
+        new = [arg for arg in args if not isinstance(arg, LITERALS) and arg not in self.ids]
+        buf = io.BytesIO()
+        _Pickler(buf, self.ids).dump((event, args))
+        for arg in new:
+            self.ids[arg] = self.next_id
+            self.next_id += 1
+        self.pending += LENGTH.pack(buf.tell()) + buf.getvalue()
+        self.count += 1
+
+    def sync(self):
+        """Write out the changes recorded so far; Compact if there are too many"""
+        if self.pending:
+            self.log.write(self.pending)
+            self.log.flush()
+            os.fsync(self.log.fileno())
+            self.pending.clear()
+        if self.count >= self.compact_after:
+            self.snapshot()
+
+    def close(self):
+        self.sync()
+        self.log.close()
+        if self in world.listeners:
+            world.listeners.remove(self)
+
+
+def _apply(event, args):
+    if event == "move":
+        character, room = args
+        old = world.locations.get(character)
+        if old is not None:
+            old.occupants.pop(character, None)
+        character.location = room
+        room.occupants[character] = None
+        world.locations[character] = room
+    elif event == "remove":
+        character = args[0]
+        room = world.locations.pop(character, None)
+        if room is not None:
+            room.occupants.pop(character, None)
+        character.location = None
+    elif event == "room":
+        site, room = args
+        site.rooms.append(room)
+        site.adjacency[room] = room.door_to
+    elif event == "door_new":
+        world.door_new(*args)
+    elif event == "door":
+        room, dest, is_open, lock = args
+        world.set_door(room, dest, is_open, lock)
+    elif event == "place":
+        world.place_item(*args)
+    elif event == "take":
+        world.take_item(*args)
+    elif event == "item":
+        room, item, data = args
+        from items.codec import decode
+        new = decode(data)
+        for held in (room.floor, room.furniture):
+            for i, other in enumerate(held):
+                if other is item:
+                    held[i] = new
+        return item, new
+
+
+def load(path):
+    """Rebuild the world saved at PATH; Return the list of top-level Sites
+
+    Do this before any Journal is attached, as replaying goes through world. Rooms
+        of a LazySite are all in memory once loaded, and are kept there until the
+        replay is done, so that their items stay the objects the journal names.
+    """
+    with open(path + ".snap", "rb") as f:
+        generation, top = pickle.load(f)
+        objects = [
+            item.__new__(item) if isinstance(item, type) else item
+            for item in pickle.load(f)
+        ]
+        unpickler = _Unpickler(f, objects)
+        for obj in objects:
+            if is_shell(obj):
+                restore(obj, unpickler.load())
+    sites = [objects[i] for i in top]
+    held = [o for o in objects if isinstance(o, world.Site) and hasattr(o, "hold")]
+    for site in held:
+        site.hold += 1
+    try:
+        _replay(path, generation, objects)
+    finally:
+        for site in held:
+            site.hold -= 1
+    return sites
+
+
+def _replay(path, generation, objects):
+    for room in (o for o in objects if hasattr(o, "occupants")):  # Rooms, or handles
+        for character in room.occupants:
+            world.locations[character] = room
+
+    try:
+        log = open(path + ".log", "rb")
+    except FileNotFoundError:
+        return
+    with log:
+        head = log.read(HEADER.size)
+        if len(head) < HEADER.size or HEADER.unpack(head) != (MAGIC, generation):
+            # Journal of an older snapshot, left behind by an interrupted compaction
+            return
+        index = {id(obj): i for i, obj in enumerate(objects)}
+        while True:
+            head = log.read(LENGTH.size)
+            if len(head) < LENGTH.size:
+                break
+            size = LENGTH.unpack(head)[0]
+            data = log.read(size)
+            if len(data) < size:
+                break  # Torn record at the end
+            event, args = _Unpickler(io.BytesIO(data), objects).load()
+            for arg in args:
+                if not isinstance(arg, LITERALS) and id(arg) not in index:
+                    index[id(arg)] = len(objects)
+                    objects.append(arg)
+            replaced = _apply(event, args)
+            if replaced:
+                old, new = replaced
+                i = index.pop(id(old))
+                objects[i] = new
+                index[id(new)] = i
@@ -0,0 +1,191 @@
+"""
+Sites too big to keep in memory. A LazySite hands out RoomHandles in place of
+Rooms; They stand wherever a Room would (doors, occupants' locations, adjacency),
+and fetch the Room itself whenever it is used. Only the most recently used Rooms
+stay in memory. Empty ones beyond the budget are written to a dbm file and dropped,
+to be read back on next use.
+
+Rooms of a LazySite may only lead to one another. Keep hold of handles, never of
+the Rooms or lists they give out: Once a Room has been written out, changes to its
+old parts are lost.
+
+Pickling a LazySite or a RoomHandle (as journal and shard do) carries every Room
+in full; The copy starts with all of them in memory, and a temporary store.
+"""
+from collections import OrderedDict
+import dbm
+import io
+import os
+import pickle
+import tempfile
+import weakref
+
+import world
+
+
+class RoomHandle:
+    __slots__ = ("site", "index", "_room")
+
+    def __init__(self, site, index, room=None):
+        object.__setattr__(self, "site", site)
+        object.__setattr__(self, "index", index)
+        object.__setattr__(self, "_room", room)
+
+    @property
+    def resident(self):
+        return self._room is not None
+
+    def __getattr__(self, name):
+        # Slots not yet set (as while unpickling) and special names are never the Room's
+        if name in RoomHandle.__slots__ or name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.site.materialize(self), name)
+
+    def __getstate__(self):
+        return self.site, self.index, self.site.materialize(self).__dict__
+
+    def __setstate__(self, state):
+        site, index, room_state = state
+        room = world.Room.__new__(world.Room)
+        room.__dict__.update(room_state)
+        object.__setattr__(self, "site", site)
+        object.__setattr__(self, "index", index)
+        object.__setattr__(self, "_room", room)
+        if "resident" in site.__dict__:  # Else the site takes us in when it is restored
+            site.resident[self] = None
+
+    def __setattr__(self, name, value):
+        setattr(self.site.materialize(self), name, value)
+
+    def __repr__(self):
+        state = "" if self._room is not None else ", stored"
+        return f"<RoomHandle {self.index}{state}>"
+
+
+class _Adjacency:
+    """Site.adjacency for a LazySite, read through the handles"""
+
+    def __init__(self, site):
+        self.site = site
+
+    def __getitem__(self, room):
+        return room.door_to
+
+    def get(self, room, default=None):
+        return room.door_to if room.site is self.site else default
+
+    def __setitem__(self, room, doors):
+        pass  # Always read from the Room itself
+
+
+class _Pickler(pickle.Pickler):
+    def __init__(self, file, site):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.site = site
+
+    def persistent_id(self, obj):
+        if obj is self.site:
+            return "site"
+        if type(obj) == RoomHandle and obj.site is self.site:
+            return obj.index
+        if type(obj) in (RoomHandle, world.Room, LazySite, world.Site):
+            raise ValueError("Rooms of a LazySite may only lead to one another")
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, site):
+        super().__init__(file)
+        self.site = site
+
+    def persistent_load(self, pid):
+        return self.site if pid == "site" else self.site.rooms[pid]
+
+
+class LazySite(world.Site):
+    """
+    A Site holding at most MAX_RESIDENT Rooms in memory, and the rest in a dbm
+        file at PATH (a temporary one by default). Rooms with occupants are never
+        written out, so the budget may be exceeded while they are many.
+    """
+
+    def __init__(self, max_resident=256, path=None):
+        super().__init__()
+        self.adjacency = _Adjacency(self)
+        self.max_resident = max_resident
+        self.hold = 0  # While above 0, nothing is written out
+        self._open(path)
+
+    def _open(self, path):
+        if path is None:
+            self._tmpdir = tempfile.TemporaryDirectory()
+            path = os.path.join(self._tmpdir.name, "rooms")
+        self.store = dbm.open(path, "n")
+        # Closed before any temporary directory is removed under it
+        self.close = weakref.finalize(self, self.store.close)
+        self.resident = OrderedDict()  # Handle -> None, least recently used first
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ("adjacency", "_tmpdir", "store", "close", "resident", "hold"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.adjacency = _Adjacency(self)
+        self.hold = 0
+        self._open(None)
+        for handle in self.rooms:
+            if getattr(handle, "_room", None) is not None:
+                self.resident[handle] = None
+
+    def new_room(self, *arg, **kw):
+        new = RoomHandle(self, len(self.rooms), world.Room(self, *arg, **kw))
+        self.rooms.append(new)
+        self.resident[new] = None
+        self.evict()
+        world.emit("room", self, new)
+        return new
+
+    def neighbours(self, room):
+        return room.door_to.keys()
+
+    def materialize(self, handle):
+        """Return the Room behind HANDLE, reading it back in if need be"""
+        room = handle._room
+        if room is not None:
+            self.resident.move_to_end(handle)
+            if len(self.resident) > self.max_resident:  # As after unpickling
+                self.evict()
+            return room
+        room = world.Room.__new__(world.Room)
+        data = self.store[str(handle.index)]
+        room.__dict__.update(_Unpickler(io.BytesIO(data), self).load())
+        object.__setattr__(handle, "_room", room)
+        self.resident[handle] = None
+        # Its items are new objects; Listeners which know them by identity catch up
+        world.emit("restore", handle, room)
+        self.evict()
+        return room
+
+    def evict(self):
+        """Write out unoccupied Rooms, least recently used first, until within budget"""
+        if self.hold:
+            return
+        for _ in range(len(self.resident)):
+            if len(self.resident) <= self.max_resident:
+                break
+            handle = next(iter(self.resident))
+            if handle._room.occupants:
+                self.resident.move_to_end(handle)  # In use; Try the next
+                continue
+            world.emit("evict", handle, handle._room)
+            self.write(handle)
+            del self.resident[handle]
+            object.__setattr__(handle, "_room", None)
+
+    def write(self, handle):
+        buf = io.BytesIO()
+        _Pickler(buf, self).dump(handle._room.__dict__)
+        self.store[str(handle.index)] = buf.getvalue()
@@ -1,4 +1,4 @@
-from numpy import random as npr
+from numpy import asarray, random as npr, where
 
 
 def normalize(in_):
@@ -6,17 +6,73 @@ def normalize(in_):
     return [float(i) / s for i in in_]
 
 
-def sample_with_replacement(l, n, weights):
-    idxs = npr.choice(range(len(l)), n, p=weights, replace=False)
+def uniform(rng=None):
+    """A random float in [0, 1), from RNG if given, or else from the global state"""
+    return npr.random() if rng is None else rng.random()
+
+
+def randint(low, high, rng=None):
+    """A random integer in [low, high), from RNG if given, or else from the global state"""
+    if rng is None:
+        return npr.randint(low, high)
+    return low + int(rng.random() * (high - low))
+
+
+def sample_with_replacement(l, n, weights, rng=None):
+    if rng is None:
+        idxs = npr.choice(range(len(l)), n, p=weights, replace=False)
+    else:
+        # Draw one at a time, taking each winner out of the running
+        weights = list(weights)
+        idxs = []
+        for _ in range(n):
+            u = rng.random() * sum(weights)
+            for i, w in enumerate(weights):
+                if u < w:
+                    break
+                u -= w
+            else:
+                # Rounding carried U off the end; Settle for the last one standing
+                i = max(j for j, w in enumerate(weights) if w)
+            idxs.append(i)
+            weights[i] = 0
     return [l[i] for i in idxs]
 
 
-def choose_from(choices, q=1, probability: list = None):
+class Variates:
+    """
+    Uniform floats, drawn from a Generator in large blocks and handed out one at a
+        time. Supports as much of the Generator interface as item construction needs,
+        so that generating many objects costs a handful of NumPy calls in total.
+    """
+
+    __slots__ = ("rng", "block", "_it")
+
+    def __init__(self, rng=None, block=1 << 16):
+        self.rng = npr.default_rng() if rng is None else rng
+        self.block = block
+        self._it = iter(())
+
+    def random(self, size=None):
+        if size is not None:
+            return self.rng.random(size)
+        try:
+            return next(self._it)
+        except StopIteration:
+            self._it = iter(self.rng.random(self.block).tolist())
+            return next(self._it)
+
+    def integers(self, low, high):
+        return low + int(self.random() * (high - low))
+
+
+def choose_from(choices, q=1, probability: list = None, rng=None):
     """
     Choices will be a list. Each item of the list may also be a list or a tuple.
         If an item of Choices is a tuple, it will be a list of subchoices and a list of probabilities.
     Probability will be a list of numbers and overrides a probability list packed with the choices.
     Choose Q objects from Choices and return them.
+    If RNG is given, all randomness is taken from it rather than the global state.
     """
     if type(choices) not in [tuple, list, range]:
         # If Choices is a single item, return it immediately.
@@ -29,16 +85,117 @@ def choose_from(choices, q=1, probability: list = None):
     if not probability:
         probability = prob or [1 for _ in choices]
 
-    choice: list = sample_with_replacement(choices, q, normalize(probability))
+    choice: list = sample_with_replacement(choices, q, normalize(probability), rng)
 
     for i in range(len(choice)):
         if type(choice[i]) == tuple:
             # If a tuple, 0 is list and 1 is prob; Choose
-            choice[i] = choose_from(choice[i][0], 1, choice[i][1])
+            choice[i] = choose_from(choice[i][0], 1, choice[i][1], rng)
         while type(choice[i]) == list and len(choice[i]) > 1 and q == 1:
             # If a list of >1, choose one; Repeat
-            choice[i] = choose_from(choice[i])
+            choice[i] = choose_from(choice[i], rng=rng)
         while type(choice[i]) == list and len(choice[i]) == 1:
             # Remove all recursion from final result
             choice[i] = choice[i][0]
     return choice
+
+
+class AliasTable:
+    """
+    A Choices tree, as accepted by choose_from(), flattened into a single immutable
+        table of outcomes. Built once with Vose's alias method, so that every draw
+        afterwards is O(1): no normalizing, no recursion.
+    """
+
+    __slots__ = ("outcomes", "prob", "alias")
+
+    def __init__(self, outcomes, weights):
+        n = len(outcomes)
+        scaled = [w * n / sum(weights) for w in weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] -= 1 - scaled[s]
+            (small if scaled[g] < 1 else large).append(g)
+
+        self.outcomes = tuple(outcomes)
+        self.prob = tuple(prob)
+        self.alias = tuple(alias)
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    def draw(self, rng=None):
+        # One uniform supplies both the column and the coin flip
+        u = uniform(rng) * len(self.outcomes)
+        i = int(u)
+        return self.outcomes[i if u - i < self.prob[i] else self.alias[i]]
+
+    def sample(self, n, rng=None):
+        """Draw N outcomes at once, as a list"""
+        u = (npr if rng is None else rng).random(n) * len(self.outcomes)
+        i = u.astype(int)
+        idx = where(u - i < asarray(self.prob)[i], i, asarray(self.alias)[i])
+        return [self.outcomes[j] for j in idx.tolist()]
+
+
+def flatten(choices, probability: list = None, weight=1.0):
+    """
+    Walk a Choices tree the same way choose_from(choices, 1) would, and return
+        every leaf along with its overall probability, as a list of pairs.
+    """
+    if type(choices) not in [tuple, list, range]:
+        return [(choices, weight)]
+
+    prob = None
+    if type(choices) == tuple:
+        (choices, prob) = choices
+
+    if not probability:
+        probability = prob or [1 for _ in choices]
+
+    s = sum(probability)
+    out = []
+    for choice, p in zip(choices, probability):
+        if type(choice) == tuple:
+            out += flatten(choice[0], choice[1], weight * p / s)
+        elif type(choice) == list:
+            out += flatten(choice, None, weight * p / s)
+        else:
+            out.append((choice, weight * p / s))
+    return out
+
+
+def compile_choices(choices, probability: list = None):
+    """Build an AliasTable from a Choices tree; See choose_from() for the format"""
+    leaves = [(c, w) for c, w in flatten(choices, probability) if w > 0]
+    return AliasTable([c for c, _ in leaves], [w for _, w in leaves])
+
+
+# Compiled tables, keyed by the id() of the tree they came from. The tree itself
+#     is kept alongside, so that its id() can never be handed out again.
+_compiled = {}
+
+
+def choose_one(choices, rng=None):
+    """
+    Equivalent to choose_from(choices)[0], but compiles Choices into an AliasTable
+        on first use and reuses it afterwards. Only meant for trees which do not
+        change, such as those declared on classes; a tree built fresh on every
+        call should go through choose_from() instead.
+    """
+    if type(choices) == AliasTable:
+        return choices.draw(rng)
+    if type(choices) not in [tuple, list, range]:
+        return choices
+    try:
+        return _compiled[id(choices)][1].draw(rng)
+    except KeyError:
+        table = compile_choices(choices)
+        _compiled[id(choices)] = (choices, table)
+        return table.draw(rng)
@@ -0,0 +1,181 @@
+"""
+Line-based network front end for the world, telnet style. Every connection is a
+Session, playing one Creature; Commands are read a line at a time, and all output
+of a command is sent at once.
+    python server.py --port 4000
+"""
+import argparse
+import asyncio
+
+import world
+from creatures.sapient import Human
+from items import generate, util, weapons
+
+# Longest line accepted from a client, and most output left unsent to one, in bytes;
+#     Together these bound the memory of a session, however slow or idle its client
+LINE_LIMIT = 1024
+OUTPUT_LIMIT = 64 * 1024
+
+HELP = """Commands:
+  look                  Describe your surroundings
+  go <n>                Go through door number n
+  open <n>, close <n>   Open or close door number n
+  examine <n>           Look closely at item number n on the floor
+  who                   List everyone here
+  quit                  Leave"""
+
+
+def describe_room(room, viewer=None):
+    lines = [f"You are in {room.inspect_tersely()}."]
+    dark = room.inspect(viewer=viewer)
+    if dark:
+        return lines + [dark]
+    for i, door in enumerate(room.doors):
+        state = "open" if door["open"] else "closed"
+        beyond = room.inspect(door)[len(door["type"]):]
+        lines.append(f"  [{i}] The {door['type']} is {state}.{beyond}")
+    for i, item in enumerate(room.floor):
+        lines.append(f"  <{i}> There is {util.title_item(item)} here.")
+    others = [c.name for c in room.occupants if c is not viewer]
+    if others:
+        lines.append(f"Also here: {', '.join(others)}.")
+    return lines
+
+
+class Session:
+    __slots__ = ("reader", "writer", "creature", "out")
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.creature = None
+        self.out = []
+
+    def send(self, *lines):
+        self.out += lines
+
+    async def flush(self):
+        if not self.out:
+            return
+        self.writer.write(("\r\n".join(self.out) + "\r\n").encode())
+        self.out.clear()
+        if self.writer.transport.get_write_buffer_size() > OUTPUT_LIMIT:
+            raise ConnectionError("Client is not reading its output")
+        await self.writer.drain()
+
+    async def readline(self):
+        try:
+            line = await self.reader.readline()
+        except ValueError:  # Line over LINE_LIMIT
+            raise ConnectionError("Line too long")
+        if not line:
+            raise ConnectionError("Client hung up")
+        return line.decode(errors="replace").strip()
+
+
+class Server:
+    def __init__(self, start):
+        self.start = start
+        self.sessions = set()
+
+    def door(self, room, arg):
+        try:
+            return room.doors[int(arg)]
+        except (ValueError, IndexError):
+            return None
+
+    def command(self, session, line):
+        """Carry out one command; Return False to end the session"""
+        me = session.creature
+        room = me.location
+        verb, _, arg = line.partition(" ")
+        verb = verb.lower()
+
+        if verb in ("", "l", "look"):
+            session.send(*describe_room(room, me))
+        elif verb in ("go", "open", "close"):
+            door = self.door(room, arg)
+            if not door:
+                session.send("There is no such way.")
+            elif verb == "go":
+                if not door["open"]:
+                    session.send(f"The {door['type']} is closed.")
+                else:
+                    world.do_move(me, door["dest"])
+                    session.send(*describe_room(door["dest"], me))
+            else:
+                opening = verb == "open"
+                world.set_door(room, door["dest"], opening)
+                if room in door["dest"].door_to:
+                    world.set_door(door["dest"], room, opening)
+                session.send(f"You {verb} the {door['type']}.")
+        elif verb in ("x", "examine"):
+            try:
+                item = room.floor[int(arg)]
+            except (ValueError, IndexError):
+                session.send("There is no such thing here.")
+            else:
+                session.send(util.render_item(item))
+        elif verb == "who":
+            session.send(", ".join(c.name for c in room.occupants) or "Nobody.")
+        elif verb == "help":
+            session.send(HELP)
+        elif verb == "quit":
+            session.send("Farewell.")
+            return False
+        else:
+            session.send("What? (Try 'help'.)")
+        return True
+
+    async def handle(self, reader, writer):
+        session = Session(reader, writer)
+        self.sessions.add(session)
+        try:
+            session.send("Welcome! What is your name?")
+            await session.flush()
+            name = (await session.readline())[:32] or "Stranger"
+            session.creature = Human(name)
+            world.do_move(session.creature, self.start)
+            session.send(*describe_room(self.start, session.creature))
+            await session.flush()
+            while True:
+                going = self.command(session, await session.readline())
+                await session.flush()
+                if not going:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            if session.creature:
+                world.do_remove(session.creature)
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=4000):
+        return await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+
+
+def demo_site(rooms=5, loot=3):
+    """A small site to wander: A row of rooms, some loot on every floor"""
+    site = world.Site()
+    row = [site.new_room(f"room {i}", "chamber", light=2) for i in range(rooms)]
+    site.connect_rooms(zip(row, row[1:]))
+    for room in row:
+        for item in generate.generate_batch(weapons.weapons, loot):
+            world.place_item(room, item)
+    return site
+
+
+async def main(host, port):
+    site = demo_site()
+    server = await Server(site.rooms[0]).serve(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port))
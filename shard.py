@@ -0,0 +1,331 @@
+"""
+World simulation split across processes. Every top-level Site, with any Sites
+within it, belongs to one shard, a worker process holding the only live copy of
+its Rooms and of the Creatures in them. A Coordinator in the parent process
+keeps the directory of which shard holds what, and carries Creatures from one
+shard to another when they move between Rooms that live apart.
+
+Rooms are addressed everywhere by key, (site number, room number), numbering all
+Sites in walk order; See room_keys(). A door leading into another shard points at
+a RemoteRoom, which knows only that key and enough to describe the room from afar.
+"""
+import io
+import multiprocessing
+import pickle
+import traceback
+from types import MappingProxyType
+
+from journal import restore, state_of
+import world
+
+
+def all_sites(sites):
+    for site in sites:
+        yield site
+        yield from all_sites(site.sites)
+
+
+def room_keys(sites):
+    """Map every Room of SITES to the key a Coordinator of SITES knows it by"""
+    return {
+        room: (i, j)
+        for i, site in enumerate(all_sites(sites))
+        for j, room in enumerate(site.rooms)
+    }
+
+
+class ShardError(Exception):
+    """Something went wrong in a worker; Carries its traceback"""
+
+
+class RemoteRoom:
+    """Stand-in for a Room held by another shard"""
+
+    __slots__ = ("key", "descriptor", "roomtype")
+    # Read-only, so that moving anything into one fails rather than going astray
+    floor = ()
+    occupants = MappingProxyType({})
+    furniture = ()
+
+    def __init__(self, key, descriptor, roomtype):
+        self.key = key
+        self.descriptor = descriptor
+        self.roomtype = roomtype
+
+    inspect_tersely = world.Room.inspect_tersely
+
+
+class _Pickler(pickle.Pickler):
+    def __init__(self, file, local, keys):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.local = local
+        self.keys = keys
+
+    def persistent_id(self, obj):
+        try:
+            if obj in self.local:
+                return "local", self.local[obj]
+            if obj in self.keys:  # A Room of another shard
+                return "remote", self.keys[obj], obj.descriptor, obj.roomtype
+        except TypeError:  # Unhashable, so neither
+            pass
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, objects):
+        super().__init__(file)
+        self.objects = objects
+        self.remote = {}
+
+    def persistent_load(self, pid):
+        if pid[0] == "local":
+            return self.objects[pid[1]]
+        # One stand-in per Room, so doors and door_to agree
+        try:
+            return self.remote[pid[1]]
+        except KeyError:
+            new = self.remote[pid[1]] = RemoteRoom(*pid[1:])
+            return new
+
+
+def pack(sites, keys):
+    """
+    Pickle SITES for a shard. KEYS maps every Room in the world to its key; Rooms
+        outside SITES become RemoteRooms. Like journal snapshots, every entity is
+        pickled on its own, so a long chain of Rooms never nests deep.
+    """
+    objects = []
+    for site in all_sites(sites):
+        objects.append(site)
+        for room in site.rooms:
+            objects.append(room)
+            objects += room.occupants
+    local = {obj: i for i, obj in enumerate(objects)}
+    buf = io.BytesIO()
+    pickle.dump(([local[s] for s in sites], [type(obj) for obj in objects]), buf)
+    pickler = _Pickler(buf, local, keys)
+    for obj in objects:
+        pickler.dump(state_of(obj))
+    return buf.getvalue()
+
+
+def unpack(data):
+    buf = io.BytesIO(data)
+    top, classes = pickle.load(buf)
+    objects = [cls.__new__(cls) for cls in classes]
+    unpickler = _Unpickler(buf, objects)
+    for obj in objects:
+        restore(obj, unpickler.load())
+    return [objects[i] for i in top]
+
+
+class Shard:
+    """The part of the world held by one worker process"""
+
+    def __init__(self, sites, numbers):
+        self.sites = sites
+        self.rooms = {}  # Key -> Room
+        self.creatures = {}  # Creature number -> Creature
+        self.outbox = []  # Creatures leaving for other shards; (number, data, key)
+        for i, site in zip(numbers, all_sites(sites)):
+            for j, room in enumerate(site.rooms):
+                self.rooms[(i, j)] = room
+                for creature in room.occupants:
+                    self.creatures[creature.uid] = creature
+                    world.locations[creature] = room
+
+    def admit(self, number, data, key):
+        room = self.rooms[key]
+        creature = pickle.loads(data)
+        self.creatures[number] = creature
+        world.do_move(creature, room)
+
+    def move(self, number, dest):
+        """Move a Creature to DEST, a Room, RemoteRoom or key; Return whether it stayed here"""
+        key = getattr(dest, "key", dest)
+        room = self.rooms.get(key) if type(key) == tuple else dest
+        creature = self.creatures[number]
+        if room is not None:
+            world.do_move(creature, room)
+            return True
+        world.do_remove(creature)
+        del self.creatures[number]
+        self.outbox.append((number, pickle.dumps(creature, pickle.HIGHEST_PROTOCOL), key))
+        return False
+
+    def go(self, number, door):
+        """Move a Creature through one of the doors of its Room"""
+        return self.move(number, door["dest"])
+
+
+def _serve(conn):
+    # A forked worker starts with the parent's world state, which is not its own
+    world.locations.clear()
+    world.listeners.clear()
+    shard = None
+    while True:
+        op, args = conn.recv()
+        if op == "stop":
+            conn.close()
+            return
+        result = error = None
+        try:
+            if op == "load":
+                data, numbers = args
+                shard = Shard(unpack(data), numbers)
+            elif op == "admit":
+                for handoff in args:
+                    shard.admit(*handoff)
+            elif op == "move":
+                result = [shard.move(number, key) for number, key in args]
+            elif op == "run":
+                func, fargs = args
+                result = func(shard, *fargs)
+        except Exception:
+            # Keep serving; The coordinator raises it on its side
+            error = traceback.format_exc()
+        outbox = shard.outbox if shard else []
+        try:
+            conn.send((result, error, outbox))
+        except Exception:  # The result would not pickle
+            conn.send((None, traceback.format_exc(), outbox))
+        if shard:
+            shard.outbox = []
+
+
+class Coordinator:
+    """
+    Split SITES among PROCESSES workers and route between them. The given Sites
+        are handed over; Once started, the live world is in the workers, reached
+        through keys and Creature numbers. The coordinator keeps no Rooms, so take
+        the keys of any that are wanted from room_keys() beforehand.
+    """
+
+    def __init__(self, sites, processes=None, context=None):
+        ctx = multiprocessing.get_context(context)
+        processes = processes or ctx.cpu_count()
+        keys = room_keys(sites)
+        numbers = {site: i for i, site in enumerate(all_sites(sites))}
+        self.site_shard = [None] * len(numbers)  # Site number -> shard
+        self.creature_shard = {}  # Creature number -> shard
+        self.pipes = []
+        self.workers = []
+
+        # Largest first, each to the least loaded shard
+        load = [0] * processes
+        parts = [[] for _ in range(processes)]
+        sizes = [sum(len(s.rooms) for s in all_sites([site])) for site in sites]
+        for i in sorted(range(len(sites)), key=sizes.__getitem__, reverse=True):
+            least = load.index(min(load))
+            parts[least].append(sites[i])
+            load[least] += sizes[i]
+
+        for n, part in enumerate(parts):
+            for site in all_sites(part):
+                self.site_shard[numbers[site]] = n
+                for room in site.rooms:
+                    for creature in room.occupants:
+                        self.creature_shard[self.number(creature)] = n
+
+        for part in parts:
+            parent, child = ctx.Pipe()
+            worker = ctx.Process(target=_serve, args=(child,), daemon=True)
+            worker.start()
+            data = pack(part, keys)
+            parent.send(("load", (data, [numbers[site] for site in all_sites(part)])))
+            self.pipes.append(parent)
+            self.workers.append(worker)
+        self._gather(range(processes))
+
+    def number(self, creature):
+        """Give CREATURE a number that follows it between shards"""
+        try:
+            return creature.uid
+        except AttributeError:
+            creature.uid = len(self.creature_shard)
+            while creature.uid in self.creature_shard:
+                creature.uid += 1
+            return creature.uid
+
+    def shard_of(self, entity):
+        """The shard holding ENTITY: A Creature number, or a Room key"""
+        if type(entity) == int:
+            return self.creature_shard[entity]
+        return self.site_shard[entity[0]]
+
+    def _gather(self, shards):
+        """
+        Collect one reply from each of SHARDS, then deliver any Creatures in transit;
+            Raise ShardError for the first shard that failed, once all have replied.
+        """
+        results = {}
+        errors = []
+        handoffs = {}
+        for n in shards:
+            results[n], error, outbox = self.pipes[n].recv()
+            if error:
+                errors.append(f"Shard {n}: {error}")
+            for number, data, key in outbox:
+                dest = self.site_shard[key[0]]
+                self.creature_shard[number] = dest
+                handoffs.setdefault(dest, []).append((number, data, key))
+        for dest, batch in handoffs.items():
+            self.pipes[dest].send(("admit", batch))
+        for dest in handoffs:
+            _, error, _ = self.pipes[dest].recv()
+            if error:
+                errors.append(f"Shard {dest}: {error}")
+        if errors:
+            raise ShardError(errors[0])
+        return results
+
+    def spawn(self, creature, key):
+        """Put a new Creature into the Room at KEY; Return its number"""
+        number = self.number(creature)
+        dest = self.shard_of(key)
+        self.creature_shard[number] = dest
+        creature.location = None
+        self.pipes[dest].send(("admit", [(number, pickle.dumps(creature), key)]))
+        self._gather([dest])
+        return number
+
+    def move(self, number, key):
+        return self.moves([(number, key)])[0]
+
+    def moves(self, pairs):
+        """Carry out many moves at once, each shard its own in parallel; PAIRS is (Creature number, key)"""
+        batches = {}
+        for i, (number, key) in enumerate(pairs):
+            batches.setdefault(self.creature_shard[number], []).append((i, number, key))
+        for n, batch in batches.items():
+            self.pipes[n].send(("move", [(number, key) for _, number, key in batch]))
+        results = self._gather(batches)
+        out = [None] * len(pairs)
+        for n, batch in batches.items():
+            for (i, _, _), stayed in zip(batch, results[n]):
+                out[i] = stayed
+        return out
+
+    def run(self, func, *args):
+        """Call func(shard, *args) in every worker at once; Return the results in shard order"""
+        for pipe in self.pipes:
+            pipe.send(("run", (func, args)))
+        results = self._gather(range(len(self.pipes)))
+        return [results[n] for n in range(len(self.pipes))]
+
+    def call(self, shard, func, *args):
+        self.pipes[shard].send(("run", (func, args)))
+        return self._gather([shard])[shard]
+
+    def close(self):
+        for pipe in self.pipes:
+            pipe.send(("stop", None))
+        for worker in self.workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
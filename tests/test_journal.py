@@ -0,0 +1,36 @@
+import world
+import journal
+from items import weapons
+from roomstore import LazySite
+
+
+def floors(site):
+    return [[type(item).__name__ for item in room.floor] for room in site.rooms]
+
+
+def test_lazy_site_keeps_item_identity(tmp_path):
+    site = LazySite(max_resident=2)
+    rooms = [site.new_room(f"room {i}") for i in range(6)]
+    site.connect_rooms(zip(rooms, rooms[1:]))
+    for room in rooms:
+        world.place_item(room, weapons.Sword())
+        world.place_item(room, weapons.Axe())
+
+    path = str(tmp_path / "world")
+    saved = journal.Journal(path, [site])
+    try:
+        for room in rooms:
+            room.floor
+        assert not rooms[0].resident
+        world.take_item(rooms[0], rooms[0].floor[0])
+        world.place_item(rooms[3], rooms[5].floor[1])
+        world.take_item(rooms[5], rooms[5].floor[1])
+        saved.sync()
+        expected = floors(site)
+    finally:
+        saved.close()
+
+    world.locations.clear()
+    (loaded,) = journal.load(path)
+    assert floors(loaded) == expected
+    assert len(loaded.rooms[0].floor) == 1
@@ -0,0 +1,27 @@
+"""
+Rendered text is cached by item revision, so stamps must keep growing after an item
+is loaded in a process whose counter started over.
+"""
+import pickle
+from itertools import count
+from random import Random
+
+from items import treasure_core, weapons
+from items.util import format_item, render_item
+
+
+def test_loaded_item_renders_fresh(monkeypatch):
+    sword = weapons.Sword(rng=Random(3))
+    part = next(c for c in sword.dictComp.values() if c is not None)
+    for _ in range(1000):
+        part.touch()
+    saved = pickle.dumps(sword)
+
+    monkeypatch.setattr(treasure_core, "_stamps", count(1))
+    sword = pickle.loads(saved)
+    before = sword.revision()
+    render_item(sword)
+    sword.set_wear("phys", 80)
+
+    assert sword.revision() > before
+    assert render_item(sword) == format_item(sword)
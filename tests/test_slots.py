@@ -0,0 +1,54 @@
+"""
+The compact classes carry no per-instance __dict__. Their size is compared against
+the same attributes held in an ordinary instance's __dict__; Run with -s to see the
+table.
+"""
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from creatures.sapient import Human
+from items import decor, weapons
+from items.consumables.effect import Effect
+
+
+def slot_names(obj):
+    names = []
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        names += [slots] if type(slots) == str else slots
+    return [n for n in names if hasattr(obj, n)]
+
+
+def dict_size(obj):
+    """Bytes the object would take with its attributes in a __dict__"""
+    plain = type("Plain", (), {})()
+    plain.__dict__.update((n, getattr(obj, n)) for n in slot_names(obj))
+    return sys.getsizeof(plain) + sys.getsizeof(plain.__dict__)
+
+
+def make_bodypart():
+    return Human("Test").body["Head"]
+
+
+@pytest.mark.parametrize(
+    "make",
+    [weapons.Sword, decor.Color, make_bodypart, lambda: Effect(SimpleNamespace(effects=[]), 10)],
+    ids=["TreasureObject", "Decor", "BodyPart", "Effect"],
+)
+def test_compact(make):
+    obj = make()
+    assert not hasattr(obj, "__dict__")
+
+    compact, loose = sys.getsizeof(obj), dict_size(obj)
+    print(f"\n{type(obj).__name__}: {loose} -> {compact} bytes ({loose - compact} saved)")
+    assert compact < loose
+
+
+def test_components_compact():
+    sword = weapons.Sword()
+    for part in sword.dictComp.values():
+        assert not hasattr(part, "__dict__")
+        for d in part.decor:
+            assert not hasattr(d, "__dict__")
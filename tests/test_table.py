@@ -0,0 +1,25 @@
+"""
+Items added one at a time, through several doublings of the columns, read back the
+same as items added in one batch.
+"""
+from random import Random
+
+from items import weapons
+from items.table import ItemTable
+
+
+def test_append_matches_extend():
+    rng = Random(5)
+    items = [weapons.Sword(rng=rng) for _ in range(40)]
+    items += [weapons.Axe(rng=rng) for _ in range(40)]
+    batch = ItemTable(items)
+    table = ItemTable(capacity=1)
+    for item in items:
+        table.append(item)
+
+    assert len(table) == len(batch) == len(items)
+    assert [table.records(i) for i in range(len(items))] == [
+        batch.records(i) for i in range(len(items))
+    ]
+    assert table.where(weapons.Axe).tolist() == list(range(40, 80))
+    assert table[-1].revision() and type(table[-1]) is weapons.Axe
@@ -1,12 +1,75 @@
 import grammar
 import dungeontime
 
+# Where every entity in the world is; Entity -> Room
+locations = {}
+# Callables told of every change to the world, as listener(event, *args)
+listeners = []
+
+
+def emit(event, *args):
+    for listener in listeners:
+        listener(event, *args)
+
+
+def where(entity):
+    return locations.get(entity)
+
 
 def do_move(character, destination):
     room = character.location
-    room.occupants.remove(character)
+    if room is not None:
+        del room.occupants[character]
     character.location = destination
-    destination.occupants.append(character)
+    destination.occupants[character] = None
+    locations[character] = destination
+    emit("move", character, destination)
+
+
+def do_moves(moves):
+    """Carry out many moves at once; MOVES is an iterable of (character, destination)"""
+    for character, destination in moves:
+        do_move(character, destination)
+
+
+def do_remove(character):
+    """Take a character out of the world entirely"""
+    room = locations.pop(character, None) or character.location
+    if room is not None:
+        room.occupants.pop(character, None)
+    character.location = None
+    emit("remove", character)
+
+
+def place_item(room, item, furniture=False):
+    """Put an item on the floor of a room, or among its furniture"""
+    (room.furniture if furniture else room.floor).append(item)
+    emit("place", room, item, furniture)
+
+
+def take_item(room, item):
+    """Take an item out of a room, from wherever it is"""
+    for held in (room.floor, room.furniture):
+        for i, other in enumerate(held):
+            if other is item:
+                del held[i]
+                emit("take", room, item)
+                return item
+
+
+def change_item(room, item):
+    """Announce that an item in a room has been altered in place"""
+    emit("item", room, item)
+
+
+def set_door(room, dest, is_open=None, lock=None):
+    """Open, close, lock or unlock the door from ROOM to DEST"""
+    door = room.door_to[dest]
+    if is_open is not None:
+        door["open"] = is_open
+    if lock is not None:
+        door["lock"] = lock
+    emit("door", room, dest, door["open"], door["lock"])
 
 
 class Room:
@@ -22,10 +85,19 @@ class Room:
             # 2: Light
 
         self.doors = []
+        self.door_to = {}  # Destination room -> door; Never more than one door each way
         self.floor = []
-        self.occupants = []
+        # An insertion-ordered set; Occupant -> None
+        self.occupants = {}
         self.furniture = []
 
+    @property
+    def population(self):
+        return len(self.occupants)
+
+    def has_door(self, door):
+        return type(door) == dict and self.door_to.get(door.get("dest")) == door
+
     def list_doors(self):
         out = []
         for door in self.doors:
@@ -38,7 +110,7 @@ class Room:
     def inspect(self, item=None, viewer=None):
         """This is a method, not a function, so that something will always be described from the point of view of a Room"""
         if item:
-            if item in self.doors:
+            if self.has_door(item):
                 # Describe the door, and possibly, the room beyond
                 new = item["type"]
                 if item["open"]:
@@ -68,7 +140,7 @@ class Room:
 
 
 def door_new(a: Room, b: Room, adjective="", pathtype="door"):
-    if True in [True if b in door.values() else False for door in a.doors]:
+    if b in a.door_to:
         return
     new = {
         "type": pathtype,
@@ -78,6 +150,10 @@ def door_new(a: Room, b: Room, adjective="", pathtype="door"):
         "adjective": adjective,
     }
     a.doors.append(new)
+    a.door_to[b] = new
+    if a.site is not None:
+        a.site.adjacency[a] = a.door_to
+    emit("door_new", a, b, adjective, pathtype)
 
 
 def connect_rooms(a: Room, b: Room, *arg, **kw):
@@ -89,7 +165,20 @@ class Site:
     def __init__(self):
         self.rooms = []
         self.sites = []
+        # Room -> {neighbouring room: door}; Shared with the door_to of each Room
+        self.adjacency = {}
 
     def new_room(self, *arg, **kw):
         new = Room(self, *arg, **kw)
         self.rooms.append(new)
+        self.adjacency[new] = new.door_to
+        emit("room", self, new)
+        return new
+
+    def neighbours(self, room):
+        return self.adjacency.get(room, {}).keys()
+
+    def connect_rooms(self, pairs, *arg, **kw):
+        """Join every pair of rooms in PAIRS both ways; See connect_rooms()"""
+        for a, b in pairs:
+            connect_rooms(a, b, *arg, **kw)